@@ -1,9 +1,30 @@
 from .base_agent import BaseAgent
-from typing import Dict, Any
+from .messages import AnalysisResult, ExtractionResult
+from typing import Dict, Any, Callable, Optional
 import json
 
 
 class AnalyzerAgent(BaseAgent):
+    output_schema = {
+        "type": "object",
+        "required": [
+            "technical_skills",
+            "years_of_experience",
+            "education",
+            "experience_level",
+            "key_achievements",
+            "domain_expertise",
+        ],
+        "properties": {
+            "technical_skills": {"type": "array", "items": {"type": "string"}},
+            "years_of_experience": {"type": ["number", "null"]},
+            "education": {"type": "object"},
+            "experience_level": {"type": "string"},
+            "key_achievements": {"type": "array"},
+            "domain_expertise": {"type": "array", "items": {"type": "string"}},
+        },
+    }
+
     def __init__(self):
         super().__init__(
             name="AnalyzerAgent",
@@ -14,12 +35,12 @@ class AnalyzerAgent(BaseAgent):
                           for the role in a JSON format.""")
         )
 
-    async def run(self, messages: list) -> Dict[str, Any]:
+    async def run(self, messages: list, on_text: Optional[Callable[[str], None]] = None) -> AnalysisResult:
         """Analyze the structured resume data"""
         print("AnalyzerAgent: Starting analysis process...")
         
-        extracted_data = eval(messages[-1]["content"])
-        structured = extracted_data.get("structured_data", {})
+        extracted_data = ExtractionResult.from_message(messages[-1]["content"])
+        structured = extracted_data.structured_data
         
         print(f"AnalyzerAgent: Received structured data keys: {list(structured.keys())}")
 
@@ -50,14 +71,44 @@ IMPORTANT:
 - Return ONLY valid JSON, no markdown, no extra text
 """
 
-        analysis_results = self._query_ollama(analysis_prompt)
-        
-        print(f"AnalyzerAgent: Raw Ollama response (first 200 chars): {analysis_results[:200]}")
-        
-        parsed_results = self._parse_json_safely(analysis_results)
+        # JSON-mode query, validated against output_schema with bounded repair retries
+        parsed_results = await self._query_json(analysis_prompt, on_text=on_text)
         
         print(f"AnalyzerAgent: Parsed result keys: {list(parsed_results.keys()) if isinstance(parsed_results, dict) else 'not a dict'}")
 
+        return self._build_result(parsed_results)
+
+    def from_fused_extraction(self, extracted_data: ExtractionResult) -> AnalysisResult:
+        """Build the analysis payload from a fused ExtractorAgent result without an LLM call.
+
+        The analysis-only keys are moved out of structured_data so both payloads
+        keep the shape produced by the two-stage pipeline.
+        """
+        structured = extracted_data.structured_data
+        if "error" in structured:
+            return self._build_result(structured)
+
+        education = structured.get("education") or [{}]
+        first_education = education[0] if isinstance(education, list) else education
+        if not isinstance(first_education, dict):
+            first_education = {}
+
+        analysis = {
+            "technical_skills": structured.get("technical_skills", []),
+            "years_of_experience": structured.get("years_of_experience", 0),
+            "education": {
+                "degree": first_education.get("degree", "Unknown"),
+                "institution": first_education.get("institution", "Unknown"),
+                "graduation_year": first_education.get("graduation_year", 0),
+            },
+            "experience_level": structured.pop("experience_level", ""),
+            "key_achievements": structured.pop("key_achievements", []),
+            "domain_expertise": structured.get("domain_expertise", []),
+        }
+        print(f"AnalyzerAgent: Built analysis from fused extraction, keys: {list(analysis.keys())}")
+        return self._build_result(analysis)
+
+    def _build_result(self, parsed_results: Dict[str, Any]) -> AnalysisResult:
         # Ensure we have valid data even if parsing fails
         if "error" in parsed_results:
             print(f"AnalyzerAgent: Parsing error detected, using defaults")
@@ -70,8 +121,8 @@ IMPORTANT:
                 "domain_expertise": []
             }
         
-        return {
-            "skills_analysis": parsed_results,
-            "analysis_timestamp": "2023-10-01T12:00:00Z",
-            "confidence_score": 0.85 if "error" not in parsed_results else 0.5,
-        }
\ No newline at end of file
+        return AnalysisResult(
+            skills_analysis=parsed_results,
+            analysis_timestamp="2023-10-01T12:00:00Z",
+            confidence_score=0.85 if "error" not in parsed_results else 0.5,
+        )
\ No newline at end of file
@@ -1,39 +1,308 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from collections import Counter, defaultdict
+import asyncio
 import json
-from openai import OpenAI
+import os
+import time
+from utils.json_schema import validate
+from utils.json_stream import JsonObjectScanner
+from utils.llm_client import get_async_client
+from utils.llm_cache import CACHE_DISABLED, get_completion_cache
+from utils.telemetry import (
+    LLM_CACHE, LLM_FIRST_BYTE_SECONDS, LLM_JSON_OUTPUTS, LLM_PROMPT_CHARS, LLM_SECONDS, LLM_TOKENS, Span, span,
+)
+from .context_builder import estimate_tokens
 
 
+OLLAMA_MODEL = "llama3.2"  # Example model name
+STREAMING_ENABLED = os.getenv("LLM_STREAMING", "1").lower() in ("1", "true", "yes")
+STREAM_EMIT_INTERVAL = 0.1  # seconds between partial-text callbacks
+JSON_TEMPERATURE = float(os.getenv("LLM_JSON_TEMPERATURE", "0.1"))
+JSON_REPAIR_RETRIES = int(os.getenv("LLM_JSON_REPAIR_RETRIES", "2"))
+REPAIR_INSTRUCTIONS = "You fix malformed JSON. Reply with the corrected JSON object only."
+
+
+def json_output_stats() -> Dict[str, Dict[str, Any]]:
+    """Return structured-output parse failure and repair rates per agent (also on /metrics)"""
+    per_agent: Dict[str, Counter] = defaultdict(Counter)
+    for (agent_name, event), count in LLM_JSON_OUTPUTS.values().items():
+        per_agent[agent_name][event] = int(count)
+    report = {}
+    for agent_name, counts in per_agent.items():
+        calls = counts["calls"] or 1
+        report[agent_name] = {
+            **counts,
+            "parse_failure_rate": counts["parse_failures"] / calls,
+            "retry_rate": counts["repair_attempts"] / calls,
+        }
+    return report
+
 
 class BaseAgent:
-    def __init__(self,name: str, instructions: str):
+    # JSON schema for agents that reply with structured output (see _query_json)
+    output_schema: Optional[Dict[str, Any]] = None
+
+    def __init__(self,name: str, instructions: str, use_cache: bool = True):
         self.name = name
         self.instructions = instructions
-        self.ollama_client = OpenAI(
-            base_url="http://localhost:11434/v1",  # Example base URL for Ollama
-            api_key="ollama"  # Ollama may not require an API key
-        )
+        self.use_cache = use_cache and not CACHE_DISABLED
+
+    @property
+    def ollama_client(self):
+        """ Shared async client (one keep-alive pool per event loop) """
+        return get_async_client()
     
     async def run(self, message: list) -> Dict[str, Any]:
         """ Default run method to be overridden by child classes """
         raise NotImplementedError("Subclasses must implement run()")
     
-    def _query_ollama(self, prompt: str) -> str:
-        """ Query Ollama with the following prompt """
-        try:
-            response = self.ollama_client.chat.completions.create(
-                model="llama3.2",  # Example model name
-                messages=[
-                    {"role": "system", "content": self.instructions},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.7,
+    async def _query_ollama(
+        self,
+        prompt: str,
+        use_cache: bool = True,
+        on_text: Optional[Callable[[str], None]] = None,
+        stop_at_json_end: bool = False,
+        json_mode: bool = False,
+        instructions: Optional[str] = None,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """ Query Ollama with the following prompt, served from the completion cache when possible.
+
+        With streaming enabled, on_text receives the partial reply as it grows, and
+        stop_at_json_end closes the stream as soon as the top-level JSON object ends.
+        json_mode asks Ollama for JSON output and samples at a low temperature.
+        When given, cacheable(reply) decides whether the reply may be cached.
+        """
+        instructions = self.instructions if instructions is None else instructions
+        prompt_chars = len(instructions) + len(prompt)
+        with span("llm", agent=self.name, prompt_chars=prompt_chars, json_mode=json_mode) as llm_span:
+            return await self._complete(
+                prompt, instructions, use_cache, on_text, stop_at_json_end, json_mode, cacheable, llm_span
             )
-            return response.choices[0].message.content
+
+    async def _complete(
+        self,
+        prompt: str,
+        instructions: str,
+        use_cache: bool,
+        on_text: Optional[Callable[[str], None]],
+        stop_at_json_end: bool,
+        json_mode: bool,
+        cacheable: Optional[Callable[[str], bool]],
+        llm_span: Span,
+    ) -> str:
+        """ _query_ollama's body, recording cache use, timings and token counts on llm_span """
+        stats = llm_span.attributes
+        params = self._completion_params(json_mode)
+        use_cache = use_cache and self.use_cache
+        cache = get_completion_cache() if use_cache else None
+        if cache is not None:
+            cache_key = cache.make_key(instructions=instructions, prompt=prompt, **params)
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            stats["cache_hit"] = cached is not None
+            LLM_CACHE.inc(agent=self.name, result="hit" if cached is not None else "miss")
+            if cached is not None:
+                print(f"{self.name}: completion cache hit")
+                if on_text is not None:
+                    on_text(cached)
+                return cached
+
+        messages = [
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": prompt}
+        ]
+        LLM_PROMPT_CHARS.observe(stats["prompt_chars"], agent=self.name)
+        request_start = time.perf_counter()
+        try:
+            if STREAMING_ENABLED:
+                content = await self._stream_completion(messages, params, on_text, stop_at_json_end, stats)
+            else:
+                response = await self.ollama_client.chat.completions.create(messages=messages, **params)
+                content = response.choices[0].message.content
+                stats["first_byte_seconds"] = time.perf_counter() - request_start
+                self._record_usage(getattr(response, "usage", None), stats)
+                if on_text is not None:
+                    on_text(content)
         except Exception as e:
             print(f"Error querying Ollama: {e}")
             raise
 
+        LLM_SECONDS.observe(time.perf_counter() - request_start, agent=self.name)
+        if "first_byte_seconds" in stats:
+            LLM_FIRST_BYTE_SECONDS.observe(stats["first_byte_seconds"], agent=self.name)
+        if "prompt_tokens" not in stats:
+            # Not reported (e.g. a stream closed before its usage chunk): estimate as ContextBuilder does
+            stats.update(
+                prompt_tokens=estimate_tokens(instructions + prompt),
+                completion_tokens=estimate_tokens(content or ""),
+                tokens_estimated=True,
+            )
+        LLM_TOKENS.inc(stats["prompt_tokens"], agent=self.name, kind="prompt")
+        LLM_TOKENS.inc(stats["completion_tokens"], agent=self.name, kind="completion")
+        stats["completion_chars"] = len(content or "")
+
+        if cache is not None and content and (cacheable is None or cacheable(content)):
+            await asyncio.to_thread(cache.set, cache_key, content)
+        return content
+
+    @staticmethod
+    def _completion_params(json_mode: bool) -> Dict[str, Any]:
+        params = {
+            "model": OLLAMA_MODEL,
+            "max_tokens": 2000,
+            "temperature": JSON_TEMPERATURE if json_mode else 0.7,
+        }
+        if json_mode:
+            params["response_format"] = {"type": "json_object"}
+        return params
+
+    async def _cache_completion(self, prompt: str, content: str, json_mode: bool = False):
+        """ Store content as the cached reply to prompt (with this agent's instructions) """
+        if not self.use_cache:
+            return
+        cache = get_completion_cache()
+        params = self._completion_params(json_mode)
+        cache_key = cache.make_key(instructions=self.instructions, prompt=prompt, **params)
+        await asyncio.to_thread(cache.set, cache_key, content)
+
+    async def _stream_completion(
+        self,
+        messages: list,
+        params: Dict[str, Any],
+        on_text: Optional[Callable[[str], None]],
+        stop_at_json_end: bool,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """ Consume a streamed completion, optionally stopping once the JSON object closes.
+
+        stats receives first_byte_seconds and, if the server reports it, token usage.
+        """
+        stats = {} if stats is None else stats
+        scanner = JsonObjectScanner()
+        chunks = 0
+        last_emit = 0.0
+        request_start = time.perf_counter()
+        stream = await self.ollama_client.chat.completions.create(
+            messages=messages, stream=True, stream_options={"include_usage": True}, **params
+        )
+        try:
+            async for chunk in stream:
+                # The usage chunk comes last, with no choices
+                self._record_usage(getattr(chunk, "usage", None), stats)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if not delta:
+                    continue
+                if not chunks:
+                    stats["first_byte_seconds"] = time.perf_counter() - request_start
+                chunks += 1
+                closed = scanner.feed(delta)
+
+                now = time.monotonic()
+                if on_text is not None and now - last_emit >= STREAM_EMIT_INTERVAL:
+                    on_text(scanner.text)
+                    last_emit = now
+
+                if stop_at_json_end and closed:
+                    break
+        finally:
+            # Closing the HTTP stream makes Ollama stop generating trailing text
+            await stream.close()
+
+        if on_text is not None:
+            on_text(scanner.text)
+        if stop_at_json_end and scanner.complete:
+            print(f"{self.name}: JSON object closed after {chunks} streamed chunks, stopped generation")
+            return scanner.object_text
+        return scanner.text
+
+    @staticmethod
+    def _record_usage(usage, stats: Dict[str, Any]):
+        if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+            stats["prompt_tokens"] = usage.prompt_tokens
+            stats["completion_tokens"] = usage.completion_tokens or 0
+
+    async def _query_json(
+        self, prompt: str, on_text: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """ Query for a JSON object and validate it against output_schema.
+
+        An invalid reply is sent back with the validation errors for at most
+        JSON_REPAIR_RETRIES short repair calls instead of re-running the prompt.
+        Returns {"error": ...} if the reply still cannot be used.
+        """
+        LLM_JSON_OUTPUTS.inc(agent=self.name, event="calls")
+
+        # Invalid replies are never cached, or every identical request would pay for a repair
+        def valid(reply: str) -> bool:
+            return not self._check_json(reply)[1]
+
+        reply = await self._query_ollama(
+            prompt, on_text=on_text, stop_at_json_end=True, json_mode=True, cacheable=valid
+        )
+        parsed, errors = self._check_json(reply)
+        if errors:
+            LLM_JSON_OUTPUTS.inc(agent=self.name, event="parse_failures")
+
+        attempts = 0
+        while errors and attempts < JSON_REPAIR_RETRIES:
+            attempts += 1
+            LLM_JSON_OUTPUTS.inc(agent=self.name, event="repair_attempts")
+            print(f"{self.name}: reply failed validation ({errors[0]}), repair attempt {attempts}")
+            reply = await self._query_ollama(
+                self._repair_prompt(reply, errors),
+                stop_at_json_end=True,
+                json_mode=True,
+                instructions=REPAIR_INSTRUCTIONS,
+                cacheable=valid,
+            )
+            parsed, errors = self._check_json(reply)
+
+        if errors:
+            LLM_JSON_OUTPUTS.inc(agent=self.name, event="unrepaired")
+            print(f"{self.name}: giving up after {attempts} repair attempts: {errors[:3]}")
+            return {"error": "; ".join(errors[:3])}
+        if attempts:
+            LLM_JSON_OUTPUTS.inc(agent=self.name, event="repaired")
+            # The next identical request gets the repaired object straight from the cache
+            await self._cache_completion(prompt, json.dumps(parsed), json_mode=True)
+        return parsed
+
+    def _check_json(self, text: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """ Parse the reply and return (parsed, validation errors) """
+        start = (text or "").find("{")
+        end = (text or "").rfind("}")
+        if start == -1 or end == -1:
+            return None, ["no JSON object found in reply"]
+        try:
+            parsed = json.loads(text[start:end + 1])
+        except json.JSONDecodeError as e:
+            return None, [f"invalid JSON: {e}"]
+        if self.output_schema is None:
+            return parsed, []
+        return parsed, validate(parsed, self.output_schema)
+
+    def _repair_prompt(self, reply: str, errors: List[str]) -> str:
+        # Only the failing reply goes back to the model, never the original resume prompt.
+        # It is sent whole (max_tokens already bounds it): a cut-off reply cannot be fixed.
+        start = (reply or "").find("{")
+        fragment = (reply or "")[start:] if start != -1 else (reply or "")
+        problems = "\n".join(f"- {e}" for e in errors[:10])
+        schema = json.dumps(self.output_schema) if self.output_schema else "a single JSON object"
+        return f"""This JSON does not match the required schema.
+
+Problems:
+{problems}
+
+Schema:
+{schema}
+
+JSON:
+{fragment}
+
+Return ONLY the corrected JSON object."""
+
     def _parse_json_safely(self, text: str) -> Dict[str, Any]:
         """Safely parse JSON from text, handling potential errors"""
         try:
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Tuple
+import json
+import os
+
+
+# Default prompt budget for the Screener/Recommender context, in tokens
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4  # rough estimate for English text with llama tokenizers
+
+STAGE_HEADERS = {
+    "screening": "Screen this candidate using the profile, skills analysis and job matches below.",
+    "recommendation": "Give final recommendations for this candidate using the data below.",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return _chars_to_tokens(len(text))
+
+
+def _chars_to_tokens(chars: int) -> int:
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _project(workflow_context: Dict[str, Any], stage: str) -> Dict[str, Any]:
+    """Keep only the fields a stage needs; raw_text and duplicate keys are dropped"""
+    structured = (workflow_context.get("extracted_data") or {}).get("structured_data") or {}
+    profile = {
+        key: structured[key]
+        for key in ("summary", "work_experience", "education", "certifications")
+        if structured.get(key)
+    }
+    skills_analysis = (workflow_context.get("analyzed_data") or {}).get("skills_analysis") or {}
+    job_matches = [
+        {
+            "title": job.get("title"),
+            "match_score": job.get("match_score"),
+            "location": job.get("location"),
+            "requirements": job.get("requirements"),
+        }
+        for job in (workflow_context.get("job_matches") or {}).get("matched_jobs", [])
+    ]
+
+    projected = {
+        "profile": profile,
+        "skills_analysis": skills_analysis,
+        "job_matches": job_matches,
+    }
+    if stage == "recommendation":
+        screening = workflow_context.get("screening_results") or {}
+        projected["screening"] = {
+            "score": screening.get("screening_score"),
+            "report": screening.get("screening_report"),
+        }
+    return projected
+
+
+def _repr_chars(value: Any) -> int:
+    """About len(str(value)) for nested dicts/lists/strings, without building the string"""
+    if isinstance(value, str):
+        return len(value) + 2  # quotes; escapes are not counted
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(_repr_chars(v) for v in value) + 2 * max(len(value) - 1, 0)
+    if isinstance(value, dict):
+        return 2 + sum(_repr_chars(k) + 2 + _repr_chars(v) for k, v in value.items()) + 2 * max(len(value) - 1, 0)
+    return len(str(value))
+
+
+def _shrink(value: Any, max_chars: int, max_items: int) -> Any:
+    """Truncate long strings and lists anywhere inside value"""
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars].rstrip() + "…"
+    if isinstance(value, list):
+        return [_shrink(v, max_chars, max_items) for v in value[:max_items]]
+    if isinstance(value, dict):
+        return {k: _shrink(v, max_chars, max_items) for k, v in value.items()}
+    return value
+
+
+def build_stage_context(
+    workflow_context: Dict[str, Any],
+    stage: str,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[str, Dict[str, int]]:
+    """Build the prompt for a stage within token_budget.
+
+    Returns the prompt and a size report comparing it with str(workflow_context),
+    the prompt the stage used to send.
+    """
+    projected = _project(workflow_context, stage)
+    header = STAGE_HEADERS.get(stage, "")
+
+    max_chars, max_items = 800, 12
+    while True:
+        body = json.dumps(_shrink(projected, max_chars, max_items), ensure_ascii=False, separators=(",", ":"))
+        prompt = f"{header}\n\n{body}" if header else body
+        if estimate_tokens(prompt) <= token_budget or max_chars <= 40:
+            break
+        # Tighten the limits until the prompt fits the budget
+        max_chars //= 2
+        max_items = max(2, max_items // 2)
+
+    # Estimated by walking the context: str() of it would copy the whole resume again
+    original_chars = _repr_chars(workflow_context)
+    prompt_stats = {
+        "original_chars": original_chars,
+        "original_tokens": _chars_to_tokens(original_chars),
+        "prompt_chars": len(prompt),
+        "prompt_tokens": estimate_tokens(prompt),
+        "token_budget": token_budget,
+    }
+    print(f"ContextBuilder: {stage} prompt {prompt_stats['original_chars']} -> {prompt_stats['prompt_chars']} chars "
+          f"(~{prompt_stats['prompt_tokens']} tokens, budget {token_budget})")
+    return prompt, prompt_stats
@@ -1,10 +1,29 @@
-from typing import Dict,Any
-from pdfminer.high_level import extract_text # pip install pdfminer.six
+from typing import Dict,Any,Callable,Optional
+from utils.pdf_extractor import extract_pdf_text
 from .base_agent import BaseAgent
+from .messages import ExtractionResult, ResumeSubmission
 
 
 
 class ExtractorAgent(BaseAgent):
+    output_schema = {
+        "type": "object",
+        "required": ["contact_info", "technical_skills", "education", "work_experience"],
+        "properties": {
+            "contact_info": {"type": "object"},
+            "summary": {"type": ["string", "null"]},
+            "technical_skills": {"type": "array", "items": {"type": "string"}},
+            "education": {"type": "array", "items": {"type": "object"}},
+            "work_experience": {"type": "array", "items": {"type": "object"}},
+            "certifications": {"type": "array"},
+            "domain_expertise": {"type": "array", "items": {"type": "string"}},
+            "years_of_experience": {"type": ["number", "null"]},
+            # Only requested in fused mode
+            "experience_level": {"type": "string"},
+            "key_achievements": {"type": "array"},
+        },
+    }
+
     def __init__(self):
         super().__init__(
             name="ExtractorAgent",
@@ -16,18 +35,34 @@ class ExtractorAgent(BaseAgent):
         )
 
 
-    async def run(self, messages: list) -> Dict[str, Any]:
-            """Process the resume and extract information"""
+    async def run(
+        self,
+        messages: list,
+        fused: bool = False,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> ExtractionResult:
+            """Process the resume and extract information.
+
+            With fused=True the prompt also asks for the AnalyzerAgent fields
+            (experience_level, key_achievements) so analysis needs no extra LLM call.
+            """
             print("ExtractorAgent: Starting extraction process...")
             
-            resume_data = eval(messages[-1]["content"])
+            resume_data = ResumeSubmission.from_message(messages[-1]["content"])
             # Extract text from PDF
-            if resume_data.get("file_path"):
-                print(f"ExtractorAgent: Extracting text from {resume_data['file_path']}...")
-                raw_text = extract_text(resume_data["file_path"])
+            if resume_data.file_path:
+                print(f"ExtractorAgent: Extracting text from {resume_data.file_path}...")
+                # Page-level extraction runs in a process pool, off the event loop
+                raw_text = await extract_pdf_text(resume_data.file_path)
             else:
-                raw_text = resume_data.get("text", "")
+                raw_text = resume_data.text
             
+            fused_fields = ""
+            if fused:
+                fused_fields = """,
+  "experience_level": "Entry-level/Mid-level/Senior-level",
+  "key_achievements": ["achievement1", "achievement2", ...all achievements found]"""
+
             # Get structured information from Ollama with explicit prompt
             extraction_prompt = f"""Extract and structure all information from this resume. Return ONLY a valid JSON object with these fields:
 
@@ -57,7 +92,7 @@ class ExtractorAgent(BaseAgent):
   ],
   "certifications": ["cert1", "cert2", ...],
   "domain_expertise": ["domain1", "domain2", ...],
-  "years_of_experience": NUMBER
+  "years_of_experience": NUMBER{fused_fields}
 }}
 
 Resume Text:
@@ -65,22 +100,15 @@ Resume Text:
 
 Return ONLY the JSON object, no markdown formatting, no extra text.
 """
-            extracted_info = self._query_ollama(extraction_prompt)
-            
-            # Try to parse and validate
-            import json
-            try:
-                parsed = json.loads(extracted_info)
+            # JSON-mode query, validated against output_schema with bounded repair retries
+            structured_data = await self._query_json(extraction_prompt, on_text=on_text)
+            if "error" not in structured_data:
                 print(f"ExtractorAgent: Successfully extracted and parsed resume data")
-                structured_data = parsed
-            except json.JSONDecodeError:
-                print(f"ExtractorAgent: JSON parsing failed, attempting fallback parse")
-                structured_data = self._parse_json_safely(extracted_info)
 
-            return {
-                 "raw_text": raw_text,
-                 "structured_data": structured_data,
-                 "extraction_status": "completed"
-            }
+            return ExtractionResult(
+                 raw_text=raw_text,
+                 structured_data=structured_data,
+                 extraction_status="completed",
+            )
 
     
\ No newline at end of file
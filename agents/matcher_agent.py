@@ -1,10 +1,28 @@
 from .base_agent import BaseAgent
-from typing import Dict, Any
+from .messages import AnalysisResult, MatchResult
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import asyncio
+import heapq
 import json
-import re # for regex operations
+import os
 
 from db.database import JobDatabase  # Assume JobDatabase is defined elsewhere
-import sqlite3
+from db.connection import get_connection
+from db.job_index import get_job_index, match_pct, normalize_experience_level, requirement_tokens, tokenize
+
+
+# "index" scores every overlapping job in memory, "vector" does the same scoring as one
+# sparse NumPy product, "sql" counts overlaps with an indexed GROUP BY over
+# job_requirements, "scan" streams the requirements column through a cursor, and
+# "fts" ranks with SQLite FTS5/BM25 first. "semantic" ranks by embedding cosine
+# similarity and "hybrid" blends it with the token match_pct.
+MATCHER_SEARCH_MODE = os.getenv("MATCHER_SEARCH_MODE", "index")
+MATCH_TOP_K = 3
+MIN_MATCH_PCT = 30
+SCAN_FETCH_SIZE = 1000
+FTS_CANDIDATES = int(os.getenv("MATCHER_FTS_CANDIDATES", "50"))
+SEMANTIC_CANDIDATES = int(os.getenv("MATCHER_SEMANTIC_CANDIDATES", "50"))
+HYBRID_SEMANTIC_WEIGHT = float(os.getenv("MATCHER_HYBRID_WEIGHT", "0.5"))
 
 
 class MatcherAgent(BaseAgent):
@@ -20,47 +38,29 @@ class MatcherAgent(BaseAgent):
         self.db = JobDatabase()  # Assume JobDatabase is defined elsewhere
 
 
-    async def run(self, messages: list) -> Dict[str, Any]:
+    async def run(self, messages: list) -> MatchResult:
         """Match candidate with available positions"""
         print("🎯 Matcher: Finding suitable job matches")
 
         try:
-            # Convert single quotes to double quotes to make it valid JSON
-            content = messages[-1].get("content", "{}").replace("'", '"')
-            analysis_results = json.loads(content)
-        except json.JSONDecodeError as e:
+            analysis_results = AnalysisResult.from_message(messages[-1].get("content", {}))
+        except (TypeError, ValueError) as e:
             print(f"Error parsing analysis results: {e}")
-            return {
-                "matched_jobs": [],
-                "match_timestamp": "2024-03-14",
-                "number_of_matches": 0,
-            }
+            return MatchResult(match_timestamp="2024-03-14")
         
         # Extract skills and experience level from analysis
-        skills_analysis = analysis_results.get("skills_analysis", {})
+        skills_analysis = analysis_results.skills_analysis
         if not skills_analysis:
             print("No skills analysis found.")
-            return {
-                "matched_jobs": [],
-                "match_timestamp": "2024-03-14",
-                "number_of_matches": 0,
-            }
+            return MatchResult(match_timestamp="2024-03-14")
         
         # Extract technical skills and experience level directly
         skills = skills_analysis.get("technical_skills", [])
         experience_level_raw = skills_analysis.get("experience_level", "Mid-level")
 
         # Normalize experience level to match DB values
-        el = (experience_level_raw or "").lower()
-        if "senior" in el:
-            experience_level = "Senior"
-        elif "mid" in el:
-            experience_level = "Mid-level"
-        elif "entry" in el:
-            experience_level = "Entry-level"
-        elif "junior" in el:
-            experience_level = "Junior"
-        else:
+        experience_level = normalize_experience_level(experience_level_raw)
+        if experience_level is None:
             # fall back to Mid-level if unknown
             print(f"Invalid experience level found ('{experience_level_raw}'), defaulting to 'Mid-level'.")
             experience_level = "Mid-level"
@@ -70,16 +70,28 @@ class MatcherAgent(BaseAgent):
             skills = []
 
         print(f" ==>>> Skills: {skills}, Experience Level: {experience_level}")
-        # Search jobs database
-        matching_jobs = self.search_jobs(skills, experience_level)
+        # Search jobs database (blocking SQLite work runs on a worker thread)
+        ranked_search = MATCHER_SEARCH_MODE == "fts" or (MATCHER_SEARCH_MODE in ("semantic", "hybrid") and skills)
+        if ranked_search:
+            if MATCHER_SEARCH_MODE == "fts":
+                matching_jobs = await asyncio.to_thread(self.search_jobs, skills, experience_level)
+            else:
+                matching_jobs = await self.search_jobs_semantic(skills, experience_level)
+            # Lower threshold for matching to 30%
+            matching_jobs = [job for job in matching_jobs if int(job.get("match_pct", 0)) >= MIN_MATCH_PCT]
+            number_of_matches = len(matching_jobs)
+        else:
+            # Only the best MATCH_TOP_K rows are ever loaded
+            matching_jobs, number_of_matches = await asyncio.to_thread(
+                self.top_matches, skills, experience_level, MATCH_TOP_K, MIN_MATCH_PCT
+            )
 
-        # Calculate match scores using match_pct returned by search_jobs
+        # Calculate match scores using match_pct returned by the search
         scored_jobs = []
         for job in matching_jobs:
             match_score = int(job.get("match_pct", 0))
 
-            # Lower threshold for matching to 30%
-            if match_score >= 30:  # include jobs with 30% match
+            if match_score >= MIN_MATCH_PCT:
                 scored_jobs.append(
                     {
                         "title": f"{job['title']} at {job['company']}",
@@ -94,117 +106,247 @@ class MatcherAgent(BaseAgent):
         # Sort by match score
         scored_jobs.sort(key=lambda x: int(x["match_score"].rstrip("%")), reverse=True)
 
-        return {
-            "matched_jobs": scored_jobs[:3],
-            "match_timestamp": "2024-03-14",
-            "number_of_matches": len(scored_jobs),
-        }
+        return MatchResult(
+            matched_jobs=scored_jobs[:MATCH_TOP_K],
+            match_timestamp="2024-03-14",
+            number_of_matches=number_of_matches,
+        )
 
     def _tokenize(self, text: str) -> set:
-        """Normalize and tokenize a skill or requirement string into a set of tokens.
+        """Normalize and tokenize a skill or requirement string (see db.job_index.tokenize)"""
+        return tokenize(text)
 
-        - Lowercases
-        - Replaces common separators with commas
-        - Removes punctuation and extraneous characters
-        - Returns both full-phrase tokens and word-level tokens for flexible matching
+    def search_jobs(self, skills: list, experience_level: str, limit: Optional[int] = None) -> list:
+        """Search jobs based on skills and experience level.
+
+        Scoring goes through the in-memory token index, so only jobs sharing a
+        matched requirement token with the candidate are touched; full rows are
+        then loaded for those jobs only. limit caps the result in "vector" mode,
+        which selects the top jobs without sorting every score.
         """
-        if not text:
-            return set()
-        s = text.lower()
-        # Normalize common separators
-        for sep in ["/", "&", "|", ";", "(", ")", ".", "-", "_"]:
-            s = s.replace(sep, ",")
-        s = s.replace(" and ", ",")
-        parts = [p.strip() for p in re.split(r"[,\n]+", s) if p.strip()]
-        tokens = set()
-        for part in parts:
-            # remove non-alphanumeric except space
-            part_clean = re.sub(r"[^a-z0-9 ]+", " ", part).strip()
-            if not part_clean:
-                continue
-            part_clean = " ".join(part_clean.split())
-            tokens.add(part_clean)
-            # add individual words as tokens
-            for w in part_clean.split():
-                tokens.add(w)
-        return tokens
-
-    def search_jobs(self, skills: list, experience_level: str) -> list:
-        """Search jobs based on skills and experience level. Query by experience level in SQL and do tokenized matching in Python for reliability."""
-        query = "SELECT * FROM jobs WHERE experience_level = ?"
-        params = [experience_level]
+        try:
+            candidate_tokens = set()
+            # Build candidate tokens from provided skills
+            for s in skills:
+                candidate_tokens.update(self._tokenize(s))
+
+            if MATCHER_SEARCH_MODE == "fts":
+                return self._search_jobs_fts(skills, candidate_tokens, experience_level)
+
+            scores = dict(self._score_jobs(candidate_tokens, experience_level, limit))
+            if not scores:
+                return []
+
+            return self._load_jobs(scores)
+
+        except Exception as e:
+            print(f"Error searching jobs: {e}")
+            return []
+
+    def top_matches(
+        self, skills: list, experience_level: str, k: int, min_pct: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return (best k jobs, number of jobs scoring at least min_pct).
+
+        Scores stream through a bounded heap, so memory stays at k entries however
+        many jobs match, and full rows are loaded and decoded for the k winners only.
+        """
+        try:
+            candidate_tokens = set()
+            for s in skills:
+                candidate_tokens.update(self._tokenize(s))
+
+            vector = self._vector_matrix(candidate_tokens)
+            if vector is not None:
+                # NumPy selects the k winners itself (argpartition), without sorting every score
+                matrix, matched_tokens = vector
+                best, matches = matrix.best(matched_tokens, experience_level, k, min_pct)
+                return (self._load_jobs(dict(best)) if best else []), matches
+
+            heap: List[Tuple[int, int]] = []  # (match_pct, -job_id): the worst winner on top
+            matches = 0
+            for job_id, pct in self._score_jobs(candidate_tokens, experience_level):
+                if pct < min_pct:
+                    continue
+                matches += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, (pct, -job_id))
+                elif (pct, -job_id) > heap[0]:
+                    heapq.heapreplace(heap, (pct, -job_id))
+
+            if not heap:
+                return [], matches
+            return self._load_jobs({-neg_id: pct for pct, neg_id in heap}), matches
+
+        except Exception as e:
+            print(f"Error searching jobs: {e}")
+            return [], 0
+
+    def _score_jobs(
+        self, candidate_tokens: set, experience_level: str, limit: Optional[int] = None
+    ) -> Iterable[Tuple[int, int]]:
+        """(job_id, match_pct) for every job at the level scored by the current search mode"""
+        if MATCHER_SEARCH_MODE == "sql":
+            return self._score_jobs_sql(candidate_tokens, experience_level).items()
+        if MATCHER_SEARCH_MODE == "scan":
+            return self._score_jobs_scan(candidate_tokens, experience_level)
+        vector = self._vector_matrix(candidate_tokens)
+        if vector is not None:
+            matrix, matched_tokens = vector
+            return matrix.top_k([matched_tokens], experience_level, limit)[0]
+        return get_job_index(self.db.db_path).score(candidate_tokens, experience_level)
+
+    def _vector_matrix(self, candidate_tokens: set):
+        """(JobMatrix, matched tokens) in "vector" mode when NumPy is available, else None"""
+        if MATCHER_SEARCH_MODE != "vector" or not candidate_tokens:
+            return None
+        from db.job_matrix import get_job_matrix, np  # other modes never load NumPy
+        if np is None:
+            return None
+        index = get_job_index(self.db.db_path)
+        return get_job_matrix(index), index.matched_tokens(candidate_tokens)
 
+    def _score_jobs_scan(self, candidate_tokens: set, experience_level: str) -> Iterable[Tuple[int, int]]:
+        """Stream (id, requirements) through a cursor and score each row as it arrives.
+
+        Needs no in-memory index; only the requirements column is read and
+        rows are never materialized beyond the current fetchmany batch.
+        """
+        conn = get_connection(self.db.db_path)
+        cursor = conn.execute(
+            "SELECT id, requirements FROM jobs WHERE experience_level = ?", (experience_level,)
+        )
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-
-                candidate_tokens = set()
-                # Build candidate tokens from provided skills
-                for s in skills:
-                    candidate_tokens.update(self._tokenize(s))
-
-                matched = []
-                for row in rows:
+            while True:
+                rows = cursor.fetchmany(SCAN_FETCH_SIZE)
+                if not rows:
+                    break
+                for job_id, requirements in rows:
                     try:
-                        reqs = json.loads(row["requirements"]) if row["requirements"] else []
+                        reqs = json.loads(requirements) if requirements else []
                     except Exception:
                         reqs = []
+                    tokens = requirement_tokens(reqs)
+                    overlap, pct = match_pct(candidate_tokens, tokens)
+                    # As in the index, no skills lists every job with requirements at 0%
+                    if overlap > 0 or (not candidate_tokens and tokens):
+                        yield job_id, pct
+        finally:
+            cursor.close()
 
-                    req_tokens = set()
-                    for r in reqs:
-                        req_tokens.update(self._tokenize(r))
-
-                    # If there are no requirement tokens, skip
-                    if not req_tokens:
-                        continue
-
-                    # Flexible overlap: count requirement tokens that have a match in candidate tokens
-                    overlap = 0
-                    for rt in req_tokens:
-                        matched_rt = False
-                        for ct in candidate_tokens:
-                            if rt == ct or rt in ct or ct in rt:
-                                matched_rt = True
-                                break
-                            # check word-level intersection
-                            if set(rt.split()).intersection(set(ct.split())):
-                                matched_rt = True
-                                break
-                        if matched_rt:
-                            overlap += 1
-
-                    match_pct = (overlap / len(req_tokens)) * 100 if len(req_tokens) > 0 else 0
-
-                    # Include jobs with at least one overlapping token (or configurable threshold)
-                    if overlap > 0 or not candidate_tokens:
-                        matched.append(
-                            {
-                                "id": row["id"],
-                                "title": row["title"],
-                                "company": row["company"],
-                                "location": row["location"],
-                                "type": row["type"],
-                                "experience_level": row["experience_level"],
-                                "salary_range": row["salary_range"],
-                                "description": row["description"],
-                                "requirements": reqs,
-                                "benefits": (
-                                    json.loads(row["benefits"]) if row["benefits"] else []
-                                ),
-                                "match_pct": int(round(match_pct)),
-                            }
-                        )
-
-                # Sort by match_pct descending
-                matched.sort(key=lambda j: j.get("match_pct", 0), reverse=True)
-
-                return matched
+    async def search_jobs_semantic(
+        self, skills: list, experience_level: str, limit: int = SEMANTIC_CANDIDATES
+    ) -> list:
+        """Rank jobs by embedding similarity to the candidate's skills.
 
+        Jobs are embedded once and only jobs added or edited since the last call are sent to
+        the embeddings endpoint. Falls back to token matching if embedding fails.
+        """
+        from db.job_vectors import candidate_text, get_vector_store
+        from utils.llm_client import embed_texts
+
+        try:
+            store = get_vector_store(self.db.db_path)
+            await store.sync()
+            [query_vector] = await embed_texts([candidate_text(skills, experience_level)])
+            return await asyncio.to_thread(
+                self._rank_semantic, query_vector, skills, experience_level, limit
+            )
         except Exception as e:
-            print(f"Error searching jobs: {e}")
+            print(f"Semantic search failed ({e}), falling back to token matching")
+            return await asyncio.to_thread(self.search_jobs, skills, experience_level)
+
+    def _rank_semantic(self, query_vector: list, skills: list, experience_level: str, limit: int) -> list:
+        """Score the level's jobs by cosine (semantic) or cosine blended with match_pct (hybrid)"""
+        from db.job_vectors import get_vector_store
+
+        with get_connection(self.db.db_path) as conn:
+            level_ids = [
+                row[0] for row in conn.execute("SELECT id FROM jobs WHERE experience_level = ?", (experience_level,))
+            ]
+        store = get_vector_store(self.db.db_path)
+
+        token_scores = {}
+        if MATCHER_SEARCH_MODE == "hybrid":
+            candidate_tokens = set()
+            for s in skills:
+                candidate_tokens.update(self._tokenize(s))
+            token_scores = dict(get_job_index(self.db.db_path).score(candidate_tokens, experience_level))
+            similarities = store.similarities(query_vector, level_ids)
+            blended = {
+                job_id: HYBRID_SEMANTIC_WEIGHT * max(similarity, 0.0) * 100
+                + (1 - HYBRID_SEMANTIC_WEIGHT) * token_scores.get(job_id, 0)
+                for job_id, similarity in similarities.items()
+            }
+            best = sorted(blended, key=lambda job_id: (-blended[job_id], job_id))[:limit]
+        else:
+            similarities = dict(store.top_k(query_vector, limit, level_ids))
+            blended = {job_id: max(similarity, 0.0) * 100 for job_id, similarity in similarities.items()}
+            best = list(similarities)
+        if not best:
             return []
 
+        jobs = self._load_jobs({job_id: int(round(blended[job_id])) for job_id in best})
+        for job in jobs:
+            job["semantic_score"] = round(similarities[job["id"]], 4)
+            job["token_match_pct"] = token_scores.get(job["id"], 0)
+        return jobs
+
+    def _load_jobs(self, scores: Dict[int, int]) -> list:
+        """Load full rows for the scored job ids, best match first"""
+        matched = []
+        job_ids = list(scores)
+        with get_connection(self.db.db_path) as conn:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(job_ids), 500):
+                chunk = job_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT * FROM jobs WHERE id IN ({placeholders})", chunk):
+                    try:
+                        reqs = json.loads(row["requirements"]) if row["requirements"] else []
+                    except Exception:
+                        reqs = []
+                    matched.append(
+                        {
+                            "id": row["id"],
+                            "title": row["title"],
+                            "company": row["company"],
+                            "location": row["location"],
+                            "type": row["type"],
+                            "experience_level": row["experience_level"],
+                            "salary_range": row["salary_range"],
+                            "description": row["description"],
+                            "requirements": reqs,
+                            "benefits": (
+                                json.loads(row["benefits"]) if row["benefits"] else []
+                            ),
+                            "match_pct": scores[row["id"]],
+                        }
+                    )
+
+        # Sort by match_pct descending (ties in id order, as the table scan returned them)
+        matched.sort(key=lambda j: (-j.get("match_pct", 0), j["id"]))
+        return matched
+
+    def _score_jobs_sql(self, candidate_tokens: set, experience_level: str) -> Dict[int, int]:
+        """Count exact token overlaps in SQL via the job_requirements table.
+
+        Unlike the in-memory index this only counts equal tokens; tokenize() already
+        emits single words, so shared words still match but substrings do not.
+        """
+        return {
+            row["job_id"]: int(round(row["overlap"] / row["total"] * 100))
+            for row in self.db.count_overlaps(list(candidate_tokens), experience_level)
+        }
+
+    def _search_jobs_fts(self, skills: list, candidate_tokens: set, experience_level: str) -> list:
+        """Take the BM25 top candidates from SQL and compute match_pct for those only"""
+        matched = []
+        for job in self.db.search_jobs(skills, experience_level, limit=FTS_CANDIDATES):
+            overlap, pct = match_pct(candidate_tokens, requirement_tokens(job["requirements"]))
+            if overlap > 0:
+                job["match_pct"] = pct
+                matched.append(job)
+        matched.sort(key=lambda j: j.get("match_pct", 0), reverse=True)
+        return matched
 
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+
+class StageMessage:
+    """Base for the typed results handed from one agent to the next.
+
+    Messages are passed between agents by reference. Where one leaves the
+    process (task queue, batch JSONL, HTTP) it goes out as its to_dict() view
+    and comes back through from_dict().
+    """
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict view used for the workflow context and the UI"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+    @classmethod
+    def from_message(cls, content: Any):
+        """Accept a message object or its dict view"""
+        if isinstance(content, cls):
+            return content
+        if isinstance(content, dict):
+            return cls.from_dict(content)
+        raise TypeError(f"{cls.__name__} cannot be built from {type(content).__name__}")
+
+
+@dataclass(slots=True)
+class ResumeSubmission(StageMessage):
+    file_path: Optional[str] = None
+    text: str = ""
+    submission_timestamp: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ExtractionResult(StageMessage):
+    raw_text: str = ""
+    structured_data: Dict[str, Any] = field(default_factory=dict)
+    extraction_status: str = "completed"
+
+
+@dataclass(slots=True)
+class AnalysisResult(StageMessage):
+    skills_analysis: Dict[str, Any] = field(default_factory=dict)
+    analysis_timestamp: str = ""
+    confidence_score: float = 0.0
+
+
+@dataclass(slots=True)
+class MatchResult(StageMessage):
+    matched_jobs: List[Dict[str, Any]] = field(default_factory=list)
+    match_timestamp: str = ""
+    number_of_matches: int = 0
+
+
+@dataclass(slots=True)
+class ScreeningResult(StageMessage):
+    screening_results: Optional[str] = None
+    screening_status: str = ""
+    screening_score: int = 0
+    prompt_stats: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class RecommendationResult(StageMessage):
+    final_recommendation: Optional[str] = None
+    recommendation_timestamp: str = ""
+    confidence_level: str = ""
+    prompt_stats: Dict[str, int] = field(default_factory=dict)
+
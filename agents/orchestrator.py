@@ -1,22 +1,35 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, Optional
+import asyncio
+import os
+import time
 from .base_agent import BaseAgent
 from .extractor_agent import ExtractorAgent
 from .analyzer_agent import AnalyzerAgent
 from .matcher_agent import MatcherAgent
 from .screener_agent import ScreenerAgent
 from .recommender_agent import RecommenderAgent
+from db.candidates import CandidateStore
+from utils.pdf_extractor import file_content_hash, text_content_hash
+from utils.telemetry import APPLICATIONS, STAGE_SECONDS, Span, Trace, start_span, trace
 
 
+# Roughly how many completions the Ollama server runs at once (OLLAMA_NUM_PARALLEL)
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+# Produce extraction and analysis from a single LLM call
+FUSED_EXTRACTION = os.getenv("RECRUITER_FUSED_EXTRACTION", "").lower() in ("1", "true", "yes")
+
 
 class OrchestratorAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, fused: bool = FUSED_EXTRACTION):
         super().__init__(
             name="OrchestratorAgent",
             instructions=("""Coordinate the recruitment workflow and delegate tasks to specialized agents.
             Ensure proper flow of information between extraction, analysis, matching, screening, and recommendation phases.
             Maintain context and aggregate results from each stage."""),
         )
+        self.fused = fused
         self.setup_agents()
+        self.candidate_store = CandidateStore()
 
 
     def setup_agents(self):
@@ -30,82 +43,144 @@ class OrchestratorAgent(BaseAgent):
     async def run(self, messages: list) -> Dict[str, Any]:
         """Process a single message through the agent"""
         prompt = messages[-1]["content"]
-        response = self._query_ollama(prompt)
+        response = await self._query_ollama(prompt)
         return self._parse_json_safely(response)
 
-    async def process_application(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Main workflow orchestrator for processing job applications"""
-        print("🎯 Orchestrator: Starting application process")
+    async def process_application(
+        self,
+        resume_data: Dict[str, Any],
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Main workflow orchestrator for processing job applications.
+
+        on_partial(stage, text) receives each stage's streamed reply as it grows;
+        on_stage(stage) is called as each stage starts and with "completed".
+        The result's "telemetry" holds the application's trace (a span per stage
+        and per LLM call), under resume_data["trace_id"] when one is given.
+        """
+        trace_id = resume_data.get("trace_id") if isinstance(resume_data, dict) else None
+        with trace(trace_id) as application_trace:
+            return await self._run_pipeline(resume_data, on_partial, on_stage, application_trace)
+
+    async def _run_pipeline(
+        self,
+        resume_data: Dict[str, Any],
+        on_partial: Optional[Callable[[str, str], None]],
+        on_stage: Optional[Callable[[str], None]],
+        application_trace: Trace,
+    ) -> Dict[str, Any]:
+        print(f"🎯 Orchestrator: Starting application process (trace {application_trace.trace_id})")
+        stage_span: Optional[Span] = None
+
+        def finish_stage(error: Optional[BaseException] = None):
+            nonlocal stage_span
+            if stage_span is not None:
+                stage_span.finish(error)
+                STAGE_SECONDS.observe(stage_span.duration, stage=stage_span.name)
+                stage_span = None
+
+        def enter(stage: str):
+            nonlocal stage_span
+            finish_stage()
+            workflow_context["current_stage"] = stage
+            if stage != "completed":
+                stage_span = start_span(stage, kind="stage")
+            if on_stage is not None:
+                on_stage(stage)
+
+        def stream_to(stage: str) -> Optional[Callable[[str], None]]:
+            if on_partial is None:
+                return None
+            return lambda text: on_partial(stage, text)
 
         workflow_context = {
             "resume_data": resume_data,
             "status": "initiated",
-            "current_stage": "extraction"
+            "current_stage": "extraction",
+            "pipeline_mode": "fused" if self.fused else "two-stage",
         }
-
+        enter("extraction")
 
         try:
+            stage_start = time.perf_counter()
             # Extraction Stage
             extracted_data = await self.extractor_agent.run(
-                [{"role": "user","content": str(resume_data)}]
+                [{"role": "user","content": resume_data}], fused=self.fused,
+                on_text=stream_to("extraction"),
             )
 
+            # Stage messages go to the next agent as objects; the context keeps dict views
             workflow_context.update({
-                "extracted_data": extracted_data,
-                "current_stage": "analysis"
+                "extracted_data": extracted_data.to_dict(),
             })
+            enter("analysis")
 
-            # Analysis Stage
-            analysis_results = await self.analyzer_agent.run(
-                [{"role": "user","content": str(extracted_data)}]
-            )
+            # Analysis Stage (fused mode reuses the extraction reply)
+            if self.fused:
+                analysis_results = self.analyzer_agent.from_fused_extraction(extracted_data)
+            else:
+                analysis_results = await self.analyzer_agent.run(
+                    [{"role": "user","content": extracted_data}],
+                    on_text=stream_to("analysis"),
+                )
+            extraction_analysis_seconds = time.perf_counter() - stage_start
+            print(f"🎯 Orchestrator: Extraction + analysis took {extraction_analysis_seconds:.2f}s "
+                  f"({workflow_context['pipeline_mode']})")
             workflow_context.update({
-                "analyzed_data": analysis_results,
-                "current_stage": "matching"
+                "analyzed_data": analysis_results.to_dict(),
+                "extraction_analysis_seconds": extraction_analysis_seconds,
             })
+            enter("matching")
 
             # Matching Stage
             job_matches = await self.matcher_agent.run(
-                [{"role": "user","content": str(analysis_results)}]
+                [{"role": "user","content": analysis_results}]
             )
             # Keep both legacy and current keys
             workflow_context.update({
-                "matched_data": job_matches,
-                "job_matches": job_matches,
-                "current_stage": "screening"
+                "matched_data": job_matches.to_dict(),
+                "job_matches": job_matches.to_dict(),
             })
 
+            # Persist the profile so recruiters can search candidates by job later
+            workflow_context["candidate_id"] = await asyncio.to_thread(
+                self._save_candidate, resume_data, extracted_data, analysis_results
+            )
+            enter("screening")
+
             # Screening Stage (optional)
             if hasattr(self, "screener_agent") and getattr(self, "screener_agent") is not None:
                 # pass full workflow context so screener has access to all data
                 screening_raw = await self.screener_agent.run(
-                    [{"role": "user","content": str(workflow_context)}]
+                    [{"role": "user","content": workflow_context}],
+                    on_text=stream_to("screening"),
                 )
                 # Normalize screening output to expected keys used by UI
                 screening_results = {
-                    "screening_report": screening_raw.get("screening_results"),
-                    "screening_score": screening_raw.get("screening_score"),
-                    "screening_status": screening_raw.get("screening_status"),
+                    "screening_report": screening_raw.screening_results,
+                    "screening_score": screening_raw.screening_score,
+                    "screening_status": screening_raw.screening_status,
                 }
                 workflow_context.update({
-                    "screened_data": screening_raw,
+                    "screened_data": screening_raw.to_dict(),
                     "screening_results": screening_results,
-                    "current_stage": "recommendation"
                 })
             else:
-                screening_results = job_matches
+                screening_results = job_matches.to_dict()
                 workflow_context.update({
                     "screened_data": screening_results,
                     "screening_results": screening_results,
-                    "current_stage": "recommendation"
                 })
+            enter("recommendation")
 
             # Recommendation Stage (optional)
             if hasattr(self, "recommender_agent") and getattr(self, "recommender_agent") is not None:
                 # pass full workflow context so recommender can access job_matches and analysis
-                final_recommendation = await self.recommender_agent.run(
-                    [{"role": "user","content": str(workflow_context)}]
-                )
+                final_recommendation = (await self.recommender_agent.run(
+                    [{"role": "user","content": workflow_context}],
+                    on_text=stream_to("recommendation"),
+                )).to_dict()
             else:
                 final_recommendation = screening_results
 
@@ -113,17 +188,100 @@ class OrchestratorAgent(BaseAgent):
             workflow_context.update({
                 "recommended_data": final_recommendation,
                 "final_recommendation": final_recommendation,
-                "current_stage": "completed",
                 "status": "success"
             })
+            enter("completed")
+            APPLICATIONS.inc(status="success")
+            workflow_context["telemetry"] = _trace_report(application_trace)
 
             return workflow_context
         
         except Exception as e:
+            finish_stage(e)
+            APPLICATIONS.inc(status="failed")
             workflow_context.update({ "status": "failed", "error": str(e) })
+            workflow_context["telemetry"] = _trace_report(application_trace)
+            raise
+        except BaseException as e:
+            # Cancelled: still close the stage span, which makes its parent current again
+            finish_stage(e)
             raise
-        
 
+    def _save_candidate(self, resume_data: Dict[str, Any], extracted_data, analysis_results) -> Optional[int]:
+        """Store the analyzed profile, keyed by the resume's content hash"""
+        try:
+            file_path = resume_data.get("file_path")
+            if resume_data.get("content_hash"):
+                source = resume_data["content_hash"]
+            elif file_path and os.path.exists(file_path):
+                source = file_content_hash(file_path)
+            elif resume_data.get("text"):
+                source = text_content_hash(resume_data["text"])
+            else:
+                source = str(file_path)
+            contact_info = extracted_data.structured_data.get("contact_info") or {}
+            name = contact_info.get("name") if isinstance(contact_info, dict) else None
+            return self.candidate_store.save_candidate(source, analysis_results.skills_analysis, name=name)
+        except Exception as e:
+            print(f"🎯 Orchestrator: Could not save candidate profile: {e}")
+            return None
+
+    async def process_batch(
+        self,
+        resumes: Iterable[Dict[str, Any]],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process many applications concurrently, yielding results in completion order.
+
+        At most max_concurrency applications are in flight, so extraction of one
+        resume overlaps the LLM stages of others. A failing application yields a
+        result with status "failed" instead of aborting the batch.
+        """
+        resume_iter = iter(resumes)  # shared by all workers, pulled lazily
+        results: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def worker():
+            try:
+                for resume_data in resume_iter:
+                    try:
+                        result = await self.process_application(resume_data)
+                    except Exception as e:
+                        print(f"🎯 Orchestrator: Application failed: {e}")
+                        result = {"resume_data": resume_data, "status": "failed", "error": str(e)}
+                    await results.put(result)
+            finally:
+                await results.put(finished)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, max_concurrency))]
+        try:
+            remaining = len(workers)
+            while remaining:
+                result = await results.get()
+                if result is finished:
+                    remaining -= 1
+                    continue
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
 
 
-    
\ No newline at end of file
+def _trace_report(application_trace: Trace) -> Dict[str, Any]:
+    """The trace plus per-stage seconds and LLM totals, for the saved result"""
+    stages: Dict[str, float] = {}
+    llm = {"calls": 0, "cache_hits": 0, "prompt_chars": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for span in application_trace.spans:
+        if span.attributes.get("kind") == "stage":
+            stages[span.name] = stages.get(span.name, 0.0) + span.duration
+        elif span.name == "llm":
+            llm["calls"] += 1
+            llm["cache_hits"] += bool(span.attributes.get("cache_hit"))
+            for key in ("prompt_chars", "prompt_tokens", "completion_tokens"):
+                llm[key] += span.attributes.get(key, 0)
+    return {
+        "trace_id": application_trace.trace_id,
+        "stages": stages,
+        "llm": llm,
+        "spans": [span.to_dict() for span in application_trace.spans],
+    }
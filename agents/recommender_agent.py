@@ -1,6 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
+import json
 
 from .base_agent import BaseAgent
+from .context_builder import build_stage_context
+from .messages import RecommendationResult
 
 
 class RecommenderAgent(BaseAgent):
@@ -16,15 +19,19 @@ class RecommenderAgent(BaseAgent):
         )
     
 
-    async def run(self, messages: list) -> Dict[str, Any]:
+    async def run(self, messages: list, on_text: Optional[Callable[[str], None]] = None) -> RecommendationResult:
         """Generate final recommendations"""
         print("💡 Recommender: Generating final recommendations")
 
-        workflow_context = eval(messages[-1]["content"])
-        recommendation = self._query_ollama(str(workflow_context))
+        workflow_context = messages[-1]["content"]  # workflow context dict, passed by reference
+        if isinstance(workflow_context, str):
+            workflow_context = json.loads(workflow_context)
+        prompt, prompt_stats = build_stage_context(workflow_context, "recommendation")
+        recommendation = await self._query_ollama(prompt, on_text=on_text)
     
-        return {
-            "final_recommendation": recommendation,
-            "recommendation_timestamp": "2025-03-14",
-            "confidence_level": "high",
-        }
\ No newline at end of file
+        return RecommendationResult(
+            final_recommendation=recommendation,
+            recommendation_timestamp="2025-03-14",
+            confidence_level="high",
+            prompt_stats=prompt_stats,
+        )
\ No newline at end of file
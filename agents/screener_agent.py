@@ -1,5 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
+import json
 from .base_agent import BaseAgent
+from .context_builder import build_stage_context
+from .messages import ScreeningResult
 
 
 class ScreenerAgent(BaseAgent):
@@ -15,17 +18,22 @@ class ScreenerAgent(BaseAgent):
             Provide comprehensive screening reports.""",
         )
 
-    async def run(self, messages: list) -> Dict[str, Any]:
+    async def run(self, messages: list, on_text: Optional[Callable[[str], None]] = None) -> ScreeningResult:
         """Screen the candidate"""
         print("👥 Screener: Conducting initial screening")
 
-        workflow_context =  eval(messages[-1]["content"]) # Assume content is a dict
-        screening_results = self._query_ollama(str(workflow_context)) # Convert dict to string for querying
+        workflow_context = messages[-1]["content"]  # workflow context dict, passed by reference
+        if isinstance(workflow_context, str):
+            workflow_context = json.loads(workflow_context)
+        # Project only the fields screening needs, within the token budget
+        prompt, prompt_stats = build_stage_context(workflow_context, "screening")
+        screening_results = await self._query_ollama(prompt, on_text=on_text)
 
-        return {
-            "screening_results": screening_results,
-            "screening_status": "2024-03-14",
-            "screening_score": 85,  # Placeholder score
-        }
+        return ScreeningResult(
+            screening_results=screening_results,
+            screening_status="2024-03-14",
+            screening_score=85,  # Placeholder score
+            prompt_stats=prompt_stats,
+        )
     # End of ScreenerAgent class
 
@@ -0,0 +1,208 @@
+#Async HTTP service for the recruitment pipeline
+#   uvicorn api:app --workers 4      (or: python api.py --workers 4)
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import socket
+import uuid
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from agents.matcher_agent import MATCH_TOP_K, MIN_MATCH_PCT
+from agents.messages import AnalysisResult
+from agents.orchestrator import OrchestratorAgent
+from db.job_index import get_job_index, normalize_experience_level
+from db.task_queue import TaskQueue
+from utils.telemetry import prometheus_text
+from worker import work
+
+
+# Applications each server process runs itself; 0 leaves the queue to worker.py processes
+API_WORKER_CONCURRENCY = int(os.getenv("RECRUITER_API_CONCURRENCY", "2"))
+STREAM_POLL_INTERVAL = 0.25  # seconds between task checks on an event stream
+UPLOAD_DIR = Path("uploads")
+
+
+class MatchRequest(BaseModel):
+    skills: List[str]
+    experience_level: str = "Mid-level"
+    limit: int = MATCH_TOP_K
+    min_pct: int = MIN_MATCH_PCT
+
+
+class Service:
+    """Everything built once per server process and shared by every request"""
+
+    def __init__(self):
+        self.orchestrator = OrchestratorAgent()
+        self.queue = TaskQueue()
+        self.worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Build the job index now rather than on the first match
+        matcher = self.orchestrator.matcher_agent
+        await asyncio.to_thread(get_job_index, matcher.db.db_path)
+        if API_WORKER_CONCURRENCY > 0:
+            name = f"api:{socket.gethostname()}:{os.getpid()}"
+            self.worker = asyncio.create_task(work(name, API_WORKER_CONCURRENCY, orchestrator=self.orchestrator))
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+
+
+service: Optional[Service] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global service
+    service = Service()
+    await service.start()
+    print(f"API: process {os.getpid()} ready")
+    try:
+        yield
+    finally:
+        await service.stop()
+
+
+app = FastAPI(title="AI Recruiter Agency", lifespan=lifespan)
+
+
+def _task_or_404(task_id: int) -> Dict[str, Any]:
+    task = service.queue.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Unknown application: {task_id}")
+    return task
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "tasks": await asyncio.to_thread(service.queue.counts)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics of this server process (stage and LLM latency, tokens, cache use)"""
+    return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/applications", status_code=202)
+async def submit_application(file: Optional[UploadFile] = File(None), text: Optional[str] = Form(None)):
+    """Queue a resume (a PDF upload or plain text) and return its application ID"""
+    if file is None and not text:
+        raise HTTPException(status_code=422, detail="Send a PDF file or resume text")
+
+    # Ties the application's stage and LLM spans together (see result["telemetry"])
+    trace_id = uuid.uuid4().hex
+    resume_data = {"submission_timestamp": datetime.now().isoformat(), "trace_id": trace_id}
+    if file is not None:
+        UPLOAD_DIR.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # The trace ID keeps same-second uploads of one name apart
+        file_path = UPLOAD_DIR / f"{timestamp}_{trace_id}_{Path(file.filename or 'resume.pdf').name}"
+        content = await file.read()
+        await asyncio.to_thread(file_path.write_bytes, content)
+        resume_data["file_path"] = str(file_path)
+    else:
+        resume_data["text"] = text
+
+    task_id = await asyncio.to_thread(service.queue.enqueue, resume_data)
+    return {"id": task_id, "trace_id": trace_id, "status": "queued", "status_url": f"/applications/{task_id}"}
+
+
+@app.get("/applications/{task_id}")
+async def get_application(task_id: int):
+    """Status, stage, queue position and (once done) the full result"""
+    return await asyncio.to_thread(_task_or_404, task_id)
+
+
+@app.get("/applications/{task_id}/events")
+async def stream_application(task_id: int):
+    """Server-sent events: "stage" and "partial" updates, then "result" or "error" """
+    await asyncio.to_thread(_task_or_404, task_id)
+
+    async def events():
+        last_stage, last_partial = None, {}
+        while True:
+            task = await asyncio.to_thread(service.queue.get, task_id)
+            if task is None:
+                return
+            if task["stage"] != last_stage:
+                last_stage = task["stage"]
+                yield _sse("stage", {"stage": task["stage"], "progress": task["progress"],
+                                     "queue_position": task["queue_position"]})
+            for stage, text in task["partial"].items():
+                if last_partial.get(stage) != text:
+                    # Only the text added since the last event
+                    yield _sse("partial", {"stage": stage, "text": text[len(last_partial.get(stage, "")):]})
+            last_partial = task["partial"]
+            if task["status"] == "done":
+                yield _sse("result", task["result"])
+                return
+            if task["status"] == "failed":
+                yield _sse("error", {"error": task["error"]})
+                return
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/match")
+async def match(request: MatchRequest):
+    """Matcher-only query: best jobs for a skill list, with no LLM stages"""
+    experience_level = normalize_experience_level(request.experience_level)
+    if experience_level is None:
+        raise HTTPException(status_code=422, detail=f"Unknown experience level: {request.experience_level}")
+    matcher = service.orchestrator.matcher_agent
+    jobs, number_of_matches = await asyncio.to_thread(
+        matcher.top_matches, request.skills, experience_level, request.limit, request.min_pct
+    )
+    return {"matched_jobs": jobs, "number_of_matches": number_of_matches}
+
+
+@app.post("/match/analysis")
+async def match_analysis(analysis: Dict[str, Any]):
+    """Run MatcherAgent on an analyzer result, exactly as the pipeline would"""
+    result = await service.orchestrator.matcher_agent.run(
+        [{"role": "user", "content": AnalysisResult.from_dict(analysis)}]
+    )
+    return result.to_dict()
+
+
+@app.get("/jobs/{job_id}/candidates")
+async def job_candidates(job_id: int, limit: int = 20, min_pct: int = 0):
+    """Best stored candidates for a job"""
+    try:
+        return await asyncio.to_thread(
+            service.orchestrator.candidate_store.search_candidates, job_id, limit, min_pct
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the recruitment pipeline over HTTP")
+    parser.add_argument("--host", default=os.getenv("RECRUITER_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("RECRUITER_API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("RECRUITER_API_WORKERS", "2")),
+                        help="Server processes, each with its own warm orchestrator")
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
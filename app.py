@@ -1,11 +1,11 @@
 #Streamlit web application
 import streamlit as st
-import asyncio
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 from streamlit_option_menu import option_menu
-from agents.orchestrator import OrchestratorAgent
+from db.task_queue import TaskQueue
 from utils.logger import setup_logger
 # from utils.exception import ResumeProcessingError
 
@@ -20,6 +20,18 @@ st.set_page_config(
 # Initialize logger
 logger = setup_logger()
 
+TASK_POLL_INTERVAL = 1.0  # seconds
+
+
+@st.cache_resource
+def get_task_queue() -> TaskQueue:
+    """One queue handle per server process, not one per script rerun"""
+    return TaskQueue()
+
+
+# Uploads are processed by worker.py processes; this script only queues and polls
+task_queue = get_task_queue()
+
 
 
 
@@ -85,24 +97,70 @@ def save_uploaded_file(uploaded_file) -> str:
         raise
 
 
-async def process_resume(file_path: str) -> dict:
-    """Process the resume through the AI recruitment pipeline."""
-    try:
-        orchestrator = OrchestratorAgent()
-        resume_data = {
-            "file_path": file_path,
-            "submission_timestamp": datetime.now().isoformat(),
-        }
-        return await orchestrator.process_application(resume_data)
-    
-    except Exception as e:
-        logger.error(f"Error processing resume: {str(e)}")
-        raise
+def submit_resume(file_path: str) -> int:
+    """Queue the resume for the background workers (see worker.py) and return the task ID."""
+    resume_data = {
+        "file_path": file_path,
+        "submission_timestamp": datetime.now().isoformat(),
+    }
+    return task_queue.enqueue(resume_data)
+
+
+def save_result(result: dict) -> Path:
+    """Write a finished analysis to results/ and return the file path."""
+    output_dir = Path("results")
+    output_dir.mkdir(exist_ok=True)
+    output_file = output_dir / f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    with open(output_file, "w") as f:
+        f.write(str(result))
+    return output_file
+
+
+def show_task_progress(task_id: int):
+    """Render the queued/running task and rerun until it finishes."""
+    task = task_queue.get(task_id)
+    if task is None:
+        st.session_state.task_id = None
+        return
+
+    progress_bar = st.progress(task["progress"])
+    status_text = st.empty()
+
+    if task["status"] == "queued":
+        position = task["queue_position"] or 0
+        status_text.text(f"Queued ({position} ahead). Waiting for a worker...")
+    elif task["status"] == "running":
+        status_text.text(f"Running {task['stage']}...")
+
+        # Live previews of the Screening/Recommendation replies as they stream
+        if task["partial"]:
+            live_tabs = st.tabs(["🎯 Screening", "💡 Recommendation"])
+            for stage, tab in zip(("screening", "recommendation"), live_tabs):
+                with tab:
+                    st.markdown(task["partial"].get(stage, ""))
+    elif task["status"] == "done":
+        progress_bar.progress(100)
+        status_text.text("Analysis complete!")
+        st.session_state.result = task["result"]
+        st.session_state.result_file = str(save_result(task["result"]))
+        st.session_state.task_id = None
+        return
+    else:
+        logger.error(f"Resume processing error (task {task_id}): {task['error']}")
+        st.error("There was an error processing your resume.")
+        st.session_state.task_id = None
+        return
+
+    # Poll: the script finishes quickly and reruns, so the session never blocks
+    time.sleep(TASK_POLL_INTERVAL)
+    st.rerun()
 
 def main():
     # Initialize session state for result persistence
     if "result" not in st.session_state:
         st.session_state.result = None
+    if "task_id" not in st.session_state:
+        st.session_state.task_id = None
     
     # Sidebar navigation only
     with st.sidebar:
@@ -126,38 +184,23 @@ def main():
         uploaded_file = st.file_uploader("Choose a PDF resume file", type="pdf", help="Upload your resume in PDF format.")
         
         if uploaded_file:
-            try:
-                with st.spinner("Saving uploaded file..."):
-                    file_path = save_uploaded_file(uploaded_file)
-                st.success("File uploaded successfully!")
-                
-                # Create placeholder for progress bar
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # Process resume
+            # The uploader keeps its file across reruns; queue each upload only once
+            upload_key = f"{uploaded_file.name}:{uploaded_file.size}"
+            if st.session_state.get("submitted_upload") != upload_key:
                 try:
-                    status_text.text("Analyzing resume...")
-                    progress_bar.progress(25)
-                    
-                    # Run analysis asynchronously
-                    result = asyncio.run(process_resume(file_path))
-                    
-                    # Store result in session state for persistence
-                    st.session_state.result = result
-                    
-                    progress_bar.progress(100)
-                    status_text.text("Analysis complete!")
-                    
+                    with st.spinner("Saving uploaded file..."):
+                        file_path = save_uploaded_file(uploaded_file)
+                    st.success("File uploaded successfully!")
+                    st.session_state.task_id = submit_resume(file_path)
+                    st.session_state.submitted_upload = upload_key
+                    st.session_state.result = None
                 except Exception as e:
-                    logger.error(f"Resume processing error: {e}")
-                    st.error("There was an error processing your resume.")
+                    logger.error(f"File upload error: {e}")
+                    st.error("There was an error uploading your file.")
                     return
-                    
-            except Exception as e:
-                logger.error(f"File upload error: {e}")
-                st.error("There was an error uploading your file.")
-                return
+
+        if st.session_state.task_id is not None:
+            show_task_progress(st.session_state.task_id)
         
         # Display results below upload section (if result exists)
         if st.session_state.result and st.session_state.result["status"] == "success":
@@ -218,22 +261,14 @@ def main():
                     icon="💡",
                 )
             
-            # Save results
-            output_dir = Path("results")
-            output_dir.mkdir(exist_ok=True)
-            output_file = (
-                output_dir
-                / f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            )
-            
-            with open(output_file, "w") as f:
-                f.write(str(result))
-            
-            st.success(f"Results saved to: {output_file}")
+            # Saved once, when the task finished
+            if st.session_state.get("result_file"):
+                st.success(f"Results saved to: {st.session_state.result_file}")
             
             # Option to clear results
             if st.button("Clear Results & Start Over"):
                 st.session_state.result = None
+                st.session_state.result_file = None
                 st.rerun()
     
     elif selected == "View Logs":
@@ -0,0 +1,185 @@
+#Headless bulk processing of resume PDFs into a JSONL file
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+
+from agents.base_agent import json_output_stats
+from agents.orchestrator import DEFAULT_BATCH_CONCURRENCY, OrchestratorAgent
+from utils.pdf_extractor import file_content_hash
+
+
+HASH_THREADS = 8  # files read and hashed at once before the run starts
+
+
+def collect_files(inputs: List[str]) -> List[Path]:
+    """PDFs under each directory or matching each glob, without repeats"""
+    files, seen = [], set()
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.rglob("*.pdf"))
+        else:
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+        for match in matches:
+            key = match.resolve()
+            if match.is_file() and key not in seen:
+                seen.add(key)
+                files.append(match)
+    return files
+
+
+def hash_files(files: List[Path]) -> List[str]:
+    """sha256 of each file, in order, read in parallel"""
+    with ThreadPoolExecutor(max_workers=HASH_THREADS) as pool:
+        return list(pool.map(file_content_hash, map(str, files)))
+
+
+class Manifest:
+    """Append-only record of finished resumes, keyed by content hash.
+
+    One JSON line per finished file, flushed and fsynced as it is written, so
+    whatever a crashed run completed is skipped when the run is started again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.completed: Set[str] = set()
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:  # torn last line of a crashed run
+                        continue
+                    if entry.get("status") == "success":
+                        self.completed.add(entry["sha256"])
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, sha256: str, file_path: str, status: str):
+        self._file.write(json.dumps({
+            "sha256": sha256,
+            "file": file_path,
+            "status": status,
+            "finished_at": datetime.now().isoformat(),
+        }) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if status == "success":
+            self.completed.add(sha256)
+
+    def close(self):
+        self._file.close()
+
+
+async def run_batch(
+    files: List[Path],
+    output: Path,
+    manifest: Manifest,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    stats: Optional[Counter] = None,
+    errors: Optional[Counter] = None,
+) -> Counter:
+    """Process files not yet in the manifest, appending one result per line to output.
+
+    stats and errors are filled in as results arrive, so an interrupted run can
+    still report them.
+    """
+    stats = Counter() if stats is None else stats
+    errors = Counter() if errors is None else errors
+    stats["files"] = len(files)
+
+    # Hashed up front on threads: process_batch pulls pending() on the event loop
+    hashes = await asyncio.to_thread(hash_files, files)
+
+    def pending() -> Iterator[Dict[str, str]]:
+        queued = set()
+        for path, sha256 in zip(files, hashes):
+            if sha256 in manifest.completed:
+                stats["skipped"] += 1
+                continue
+            if sha256 in queued:
+                stats["duplicates"] += 1
+                continue
+            queued.add(sha256)
+            yield {
+                "file_path": str(path),
+                "content_hash": sha256,
+                "submission_timestamp": datetime.now().isoformat(),
+            }
+
+    orchestrator = OrchestratorAgent()
+    start = time.perf_counter()
+    try:
+        with open(output, "a", encoding="utf-8") as out:
+            async for result in orchestrator.process_batch(pending(), max_concurrency=concurrency):
+                resume_data = result.get("resume_data") or {}
+                status = "success" if result.get("status") == "success" else "failed"
+                # Output before manifest: a crash in between repeats a line rather than losing one
+                out.write(json.dumps(result, default=str) + "\n")
+                out.flush()
+                manifest.record(resume_data.get("content_hash", ""), resume_data.get("file_path", ""), status)
+
+                stats[status] += 1
+                if status == "failed":
+                    errors[str(result.get("error", "unknown error"))[:120]] += 1
+                done = stats["success"] + stats["failed"]
+                if done % 10 == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"Batch: {done} processed ({stats['failed']} failed), {done / elapsed * 60:.1f}/min")
+    finally:
+        stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def print_stats(stats: Counter, errors: Counter):
+    processed = stats.get("success", 0) + stats.get("failed", 0)
+    seconds = stats.get("seconds", 0) or 0
+    print(f"Files found:        {stats.get('files', 0)}")
+    print(f"Already completed:  {stats.get('skipped', 0)}")
+    print(f"Duplicate content:  {stats.get('duplicates', 0)}")
+    print(f"Processed:          {processed} in {seconds:.1f}s")
+    if processed and seconds:
+        print(f"Throughput:         {processed / seconds * 60:.1f} resumes/min "
+              f"({seconds / processed:.2f}s per resume)")
+    if processed:
+        print(f"Failed:             {stats.get('failed', 0)} ({stats.get('failed', 0) / processed:.1%})")
+    for error, count in errors.most_common(5):
+        print(f"  {count} x {error}")
+    for agent_name, counts in sorted(json_output_stats().items()):
+        print(f"{agent_name + ':':<20}{counts['calls']} JSON replies, {counts['parse_failure_rate']:.1%} failed "
+              f"validation, {counts['retry_rate']:.2f} repairs per reply, {counts.get('unrepaired', 0)} unusable")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the recruitment pipeline over many resume PDFs")
+    parser.add_argument("inputs", nargs="+", help="Directories (searched recursively) or glob patterns of PDFs")
+    parser.add_argument("-o", "--output", type=Path, default=Path("results/batch.jsonl"),
+                        help="JSONL file results are appended to")
+    parser.add_argument("--manifest", type=Path, help="Completed-files manifest (default: <output>.manifest)")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY,
+                        help="Applications in flight at once")
+    args = parser.parse_args()
+
+    files = collect_files(args.inputs)
+    if not files:
+        parser.error("no PDF files found")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(args.manifest or args.output.with_name(args.output.name + ".manifest"))
+    print(f"Batch: {len(files)} files, {len(manifest.completed)} already in the manifest")
+
+    stats, errors = Counter(), Counter()
+    try:
+        asyncio.run(run_batch(files, args.output, manifest, args.concurrency, stats, errors))
+    except KeyboardInterrupt:
+        print("Batch: interrupted; run the same command again to resume")
+    finally:
+        manifest.close()
+    print_stats(stats, errors)
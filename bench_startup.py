@@ -0,0 +1,109 @@
+#Cold-start benchmark: import time and first-request latency against a budget
+#   python bench_startup.py                 (exits 1 when a budget is exceeded)
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "400"))
+FIRST_REQUEST_BUDGET_MS = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_MS", "1500"))
+
+# Entry-point modules and what each must not import until it is actually needed
+ENTRY_POINTS = ["agents.orchestrator", "worker", "batch"]
+LAZY_MODULES = ["openai", "httpx", "numpy", "pdfminer", "streamlit"]
+
+SAMPLE_ANALYSIS = {
+    "skills_analysis": {
+        "technical_skills": ["Python", "SQL", "Docker", "AWS", "React"],
+        "experience_level": "Mid-level",
+    }
+}
+
+
+def probe_import(module: str) -> Dict:
+    start = time.perf_counter()
+    __import__(module)
+    elapsed = time.perf_counter() - start
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    return {"ms": elapsed * 1000, "eager": loaded}
+
+
+def probe_first_request() -> Dict:
+    # Everything a fresh worker does before its first answer, without the LLM stages
+    import asyncio
+
+    start = time.perf_counter()
+    from agents.orchestrator import OrchestratorAgent
+    orchestrator = OrchestratorAgent()
+    setup = time.perf_counter()
+    result = asyncio.run(orchestrator.matcher_agent.run([{"role": "user", "content": SAMPLE_ANALYSIS}]))
+    end = time.perf_counter()
+    return {
+        "ms": (end - start) * 1000,
+        "setup_ms": (setup - start) * 1000,
+        "match_ms": (end - setup) * 1000,
+        "matches": result.number_of_matches,
+    }
+
+
+def _run_probe(*args: str) -> Dict:
+    # A fresh interpreter per sample, so nothing is already imported or cached in memory
+    output = subprocess.run(
+        [sys.executable, __file__, "--probe", *args],
+        cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(runs: int, import_budget: float, first_request_budget: float) -> List[str]:
+    """Print the measurements and return the budget violations"""
+    failures = []
+    for module in ENTRY_POINTS:
+        samples = [_run_probe("import", module) for _ in range(runs)]
+        ms = median(s["ms"] for s in samples)
+        eager = samples[0]["eager"]
+        print(f"import {module:<22} {ms:8.1f} ms (median of {runs})"
+              + (f"  eagerly loads: {', '.join(eager)}" if eager else ""))
+        if ms > import_budget:
+            failures.append(f"import {module} took {ms:.1f} ms (budget {import_budget:.0f} ms)")
+        if eager:
+            failures.append(f"import {module} loads {', '.join(eager)} at import time")
+
+    samples = [_run_probe("first-request") for _ in range(runs)]
+    ms = median(s["ms"] for s in samples)
+    print(f"first request                {ms:8.1f} ms (median of {runs}; "
+          f"setup {median(s['setup_ms'] for s in samples):.1f} ms, "
+          f"match {median(s['match_ms'] for s in samples):.1f} ms)")
+    if ms > first_request_budget:
+        failures.append(f"first request took {ms:.1f} ms (budget {first_request_budget:.0f} ms)")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and first-request latency")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS, help="Milliseconds per entry point")
+    parser.add_argument("--first-request-budget", type=float, default=FIRST_REQUEST_BUDGET_MS, help="Milliseconds")
+    parser.add_argument("--probe", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        sys.path.insert(0, str(Path(__file__).parent))
+        kind, *rest = args.probe
+        result = probe_import(rest[0]) if kind == "import" else probe_first_request()
+        print(json.dumps(result))
+        sys.exit(0)
+
+    failures = run_benchmark(args.runs, args.import_budget, args.first_request_budget)
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nWithin budget")
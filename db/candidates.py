@@ -0,0 +1,227 @@
+import heapq
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from db.connection import get_connection
+from db.database import JobDatabase
+from db.job_index import TokenIndex, get_job_index, normalize_experience_level, requirement_tokens, tokenize
+
+
+# Best jobs kept per stored candidate (kept up to date by db/rematch.py)
+RETAINED_MATCHES = int(os.getenv("CANDIDATE_RETAINED_MATCHES", "20"))
+
+UPSERT_CANDIDATE_QUERY = """
+        INSERT INTO candidates (source, name, experience_level, skills_analysis) VALUES (?, ?, ?, ?)
+        ON CONFLICT (source) DO UPDATE SET
+            name = excluded.name,
+            experience_level = excluded.experience_level,
+            skills_analysis = excluded.skills_analysis,
+            updated_at = CURRENT_TIMESTAMP"""
+
+
+def rank_matches(scores: Iterable[Tuple[int, int]], k: int = RETAINED_MATCHES) -> List[Tuple[int, int]]:
+    """The k best (job_id, match_pct) pairs, ordered as MatcherAgent orders jobs"""
+    return heapq.nsmallest(k, scores, key=lambda s: (-s[1], s[0]))
+
+
+def store_matches(conn, candidate_id: int, job_matches: List[Tuple[int, int]]):
+    """Replace a candidate's stored top-k (inside the caller's transaction)"""
+    conn.execute("DELETE FROM candidate_matches WHERE candidate_id = ?", (candidate_id,))
+    conn.executemany(
+        "INSERT INTO candidate_matches (candidate_id, job_id, match_pct) VALUES (?, ?, ?)",
+        [(candidate_id, job_id, pct) for job_id, pct in job_matches],
+    )
+
+
+def candidate_tokens(skills_analysis: Dict[str, Any]) -> frozenset:
+    """The tokens MatcherAgent builds from a candidate's technical skills"""
+    skills = skills_analysis.get("technical_skills") or []
+    tokens = set()
+    for skill in skills if isinstance(skills, list) else []:
+        if isinstance(skill, str):
+            tokens.update(tokenize(skill))
+    return frozenset(tokens)
+
+
+class CandidateIndex(TokenIndex):
+    """Token -> candidate posting lists over the candidates table, kept in memory.
+
+    Scores candidates for a job with MatcherAgent's rule: the share of the job's
+    requirement tokens that some candidate token matches. Each requirement token
+    is resolved against the candidate vocabulary once, so only candidates that
+    share a matched token are touched.
+    """
+
+    def __init__(self, db_path: Path):
+        super().__init__(db_path)
+        self.signature: Tuple = ()
+
+    def build(self):
+        """(Re)load every candidate's skill tokens from the database"""
+        with self._lock:
+            self._clear()
+            tokens_by_candidate = defaultdict(set)
+            with get_connection(self.db_path) as conn:
+                self.signature = _candidates_signature(conn)
+                for candidate_id, token in conn.execute("SELECT candidate_id, token FROM candidate_tokens"):
+                    tokens_by_candidate[candidate_id].add(token)
+                for candidate_id, experience_level in conn.execute("SELECT id, experience_level FROM candidates"):
+                    self._add(candidate_id, experience_level, frozenset(tokens_by_candidate.pop(candidate_id, ())))
+            self._invalidate_vocab()
+
+    def add_candidate(self, candidate_id: int, experience_level: str, tokens: frozenset):
+        """Index one newly saved (or updated) candidate"""
+        with self._lock:
+            self._remove(candidate_id)
+            self._add(candidate_id, experience_level, tokens)
+            self._invalidate_vocab()
+
+    def profile(self, candidate_id: int) -> Tuple[Optional[str], frozenset]:
+        """(experience_level, tokens) as indexed for one candidate"""
+        with self._lock:
+            return self._item_level.get(candidate_id), self._item_tokens.get(candidate_id, frozenset())
+
+    def score(self, req_tokens: Iterable[str], experience_level: str) -> List[Tuple[int, int]]:
+        """Return (candidate_id, match_pct) for every candidate at this level matching a requirement"""
+        req_tokens = set(req_tokens)
+        if not req_tokens:
+            return []
+        with self._lock:
+            self._ensure_vocab_blob()
+            level_postings = self._postings.get(experience_level, {})
+            overlaps = Counter()
+            for token in req_tokens:
+                candidate_ids = set()
+                for vocab_token in self._matching_vocab(token):
+                    candidate_ids.update(level_postings.get(vocab_token, ()))
+                overlaps.update(candidate_ids)
+
+            return [
+                (candidate_id, int(round(overlap / len(req_tokens) * 100)))
+                for candidate_id, overlap in overlaps.items()
+            ]
+
+
+def _candidates_signature(conn) -> Tuple:
+    # Changes whenever a candidate is added or re-saved, from any process
+    return tuple(conn.execute("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM candidates").fetchone())
+
+
+_indexes: Dict[str, CandidateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_candidate_index(db_path: Path) -> CandidateIndex:
+    """Return the process-wide candidate index for db_path, rebuilding it when stale"""
+    key = str(db_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = CandidateIndex(db_path)
+            index.build()
+            _indexes[key] = index
+            return index
+
+    with get_connection(db_path) as conn:
+        signature = _candidates_signature(conn)
+    if signature != index.signature:
+        index.build()
+    return index
+
+
+class CandidateStore:
+    """Analyzed candidate profiles in jobs.db, searchable by job"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        # Shares the jobs database (and its migrations)
+        self.db = JobDatabase(db_path)
+        self.db_path = self.db.db_path
+
+    def save_candidate(self, source: str, skills_analysis: Dict[str, Any], name: Optional[str] = None) -> int:
+        """Add or update (by source, e.g. the resume's content hash) a profile and return its ID"""
+        experience_level = normalize_experience_level(skills_analysis.get("experience_level")) or "Mid-level"
+        tokens = candidate_tokens(skills_analysis)
+        with get_connection(self.db_path) as conn:
+            job_matches = rank_matches(get_job_index(self.db_path).score(tokens, experience_level)) if tokens else []
+            conn.execute(UPSERT_CANDIDATE_QUERY, (source, name, experience_level, json.dumps(skills_analysis)))
+            candidate_id = conn.execute("SELECT id FROM candidates WHERE source = ?", (source,)).fetchone()[0]
+            store_matches(conn, candidate_id, job_matches)
+            conn.execute("DELETE FROM candidate_tokens WHERE candidate_id = ?", (candidate_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO candidate_tokens (candidate_id, token) VALUES (?, ?)",
+                [(candidate_id, token) for token in tokens],
+            )
+
+        index = _indexes.get(str(self.db_path))
+        if index is not None:
+            index.add_candidate(candidate_id, experience_level, tokens)
+            with get_connection(self.db_path) as conn:
+                index.signature = _candidates_signature(conn)
+        return candidate_id
+
+    def get_candidates(self, candidate_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Load stored profiles by ID"""
+        candidate_ids = list(candidate_ids)
+        candidates = {}
+        with get_connection(self.db_path) as conn:
+            for i in range(0, len(candidate_ids), 500):
+                chunk = candidate_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", chunk):
+                    candidates[row["id"]] = {
+                        "id": row["id"],
+                        "source": row["source"],
+                        "name": row["name"],
+                        "experience_level": row["experience_level"],
+                        "skills_analysis": json.loads(row["skills_analysis"]) if row["skills_analysis"] else {},
+                        "job_matches": [],
+                        "updated_at": row["updated_at"],
+                    }
+                for row in conn.execute(
+                    f"SELECT candidate_id, job_id, match_pct FROM candidate_matches "
+                    f"WHERE candidate_id IN ({placeholders}) ORDER BY match_pct DESC, job_id",
+                    chunk,
+                ):
+                    if row["candidate_id"] in candidates:
+                        candidates[row["candidate_id"]]["job_matches"].append(
+                            {"job_id": row["job_id"], "match_pct": row["match_pct"]}
+                        )
+        return candidates
+
+    def rank_candidates(
+        self, requirements: List[str], experience_level: str, limit: int = 20, min_pct: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Best stored candidates for a job given by its requirements and level"""
+        return self._rank(requirement_tokens(requirements), experience_level, limit, min_pct)
+
+    def search_candidates(self, job_id: int, limit: int = 20, min_pct: int = 0) -> List[Dict[str, Any]]:
+        """Best stored candidates for a job in the database, best match first"""
+        with get_connection(self.db_path) as conn:
+            job = conn.execute("SELECT experience_level FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                raise ValueError(f"Unknown job id: {job_id}")
+            tokens = frozenset(
+                row[0] for row in conn.execute("SELECT token FROM job_requirements WHERE job_id = ?", (job_id,))
+            )
+        return self._rank(tokens, job["experience_level"], limit, min_pct)
+
+    def _rank(self, req_tokens: Set[str], experience_level: str, limit: int, min_pct: int) -> List[Dict[str, Any]]:
+        scores = [
+            (candidate_id, pct)
+            for candidate_id, pct in get_candidate_index(self.db_path).score(req_tokens, experience_level)
+            if pct >= min_pct
+        ]
+        best = heapq.nsmallest(limit, scores, key=lambda s: (-s[1], s[0]))
+        profiles = self.get_candidates(candidate_id for candidate_id, _ in best)
+        ranked = []
+        for candidate_id, pct in best:
+            candidate = profiles.get(candidate_id)
+            if candidate is None:  # deleted since the index was built
+                continue
+            candidate["match_pct"] = pct
+            ranked.append(candidate)
+        return ranked
@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict
+
+
+# Applied to every pooled connection. WAL lets readers run alongside a writer;
+# synchronous=NORMAL is durable in WAL mode except for the last commits on power loss.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",      # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MiB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=30000",
+)
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+
+
+def get_connection(db_path: Path) -> sqlite3.Connection:
+    """Return this thread's persistent connection to db_path.
+
+    SQLite connections cannot be shared across threads, so the pool holds one
+    connection per (thread, database). Rows come back as sqlite3.Row, which
+    supports both index and column-name access.
+    """
+    connections: Dict[str, sqlite3.Connection] = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    key = str(db_path)
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30, cached_statements=CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        connections[key] = conn
+    return conn
+
+
+def close_connections():
+    """Close every pooled connection owned by the calling thread"""
+    connections = getattr(_local, "connections", None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
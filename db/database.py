@@ -1,40 +1,149 @@
-import sqlite3
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, Iterable, List, Optional
 import os
 import json
+import threading
+
+from db.connection import get_connection
+from db.job_index import invalidate_job_index, notify_job_added, requirement_tokens, tokenize
+from db.migrations import fill_job_requirements, migrate
+from utils.skill_taxonomy import canonical_skills, skill_aliases
+
+
+UPSERT_JOB_QUERY = """
+        INSERT INTO jobs (title, company, location, type, experience_level,
+        salary_range, description, requirements, benefits) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (title, company, location) DO UPDATE SET
+            type = excluded.type,
+            experience_level = excluded.experience_level,
+            salary_range = excluded.salary_range,
+            description = excluded.description,
+            requirements = excluded.requirements,
+            benefits = excluded.benefits,
+            updated_at = CURRENT_TIMESTAMP
+        -- Unchanged rows are left alone, so no-op refreshes fire no triggers
+        WHERE jobs.type IS NOT excluded.type
+            OR jobs.experience_level IS NOT excluded.experience_level
+            OR jobs.salary_range IS NOT excluded.salary_range
+            OR jobs.description IS NOT excluded.description
+            OR jobs.requirements IS NOT excluded.requirements
+            OR jobs.benefits IS NOT excluded.benefits"""
+UPSERT_JOB_RETURNING_QUERY = UPSERT_JOB_QUERY + " RETURNING id"
+
+# Dropped during deferred bulk loads and rebuilt once at the end
+DROP_DEFERRABLE_INDEXES = """
+    DROP TRIGGER IF EXISTS jobs_fts_insert;
+    DROP TRIGGER IF EXISTS jobs_fts_delete;
+    DROP TRIGGER IF EXISTS jobs_fts_update;
+    DROP INDEX IF EXISTS idx_jobs_experience_level;
+    DROP INDEX IF EXISTS idx_job_requirements_token;
+"""
+CREATE_DEFERRABLE_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_jobs_experience_level ON jobs(experience_level, id);
+    CREATE INDEX IF NOT EXISTS idx_job_requirements_token ON job_requirements(token, job_id);
+"""
+
+# Databases whose schema/migrations already ran in this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
 
 
 class JobDatabase:
-    def __init__(self):
+    def __init__(self, db_path: Optional[Path] = None):
         # Get the directory where database.py is located
         current_dir = Path(__file__).parent
-        self.db_path = current_dir / "jobs.db"
+        self.db_path = Path(db_path) if db_path else current_dir / "jobs.db"
         self.schema_path = current_dir / "schema.sql"
         self._init_db()
 
     def _init_db(self):
-        # Initialize the database with schema
-        if not self.schema_path.exists():
-            raise FileNotFoundError(f"Schema file not found at {self.schema_path}")
-        
-        with open(self.schema_path, "r") as f:
-            schema = f.read()
+        # Initialize the database with schema, once per process
+        with _init_lock:
+            if str(self.db_path) in _initialized_paths:
+                return
+
+            if not self.schema_path.exists():
+                raise FileNotFoundError(f"Schema file not found at {self.schema_path}")
+
+            with open(self.schema_path, "r") as f:
+                schema = f.read()
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.executescript(schema)
+            with get_connection(self.db_path) as conn:
+                conn.executescript(schema)
+                # Bring existing jobs.db files up to date in place (see db/migrations.py)
+                migrate(conn)
+            _initialized_paths.add(str(self.db_path))
 
     def add_job(self, job_data: Dict[str, Any]) -> int:
-        """ Add a new job to the database and return its ID. """
-            
+        """ Add (or update, by title/company/location) a job and return its ID. """
+        with get_connection(self.db_path) as conn:
+            job_id = self._upsert_batch(conn, [job_data])[0]
 
-        query = """
-                INSERT INTO jobs (title,company,location, type, experience_level, 
-                salary_range, description, requirements, benefits) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (
+        # Keep the matcher's in-memory index hot
+        notify_job_added(self.db_path, job_id, job_data.get("experience_level"), job_data.get("requirements") or [])
+        return job_id
+
+    def add_jobs(
+        self,
+        jobs: Iterable[Dict[str, Any]],
+        batch_size: int = 1000,
+        defer_indexes: bool = False,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """ Upsert jobs from any iterable in batched transactions and return the count.
+
+        The iterable is consumed lazily, one batch at a time. With defer_indexes the
+        full-text triggers and secondary indexes are dropped for the load and rebuilt
+        once at the end, which is much faster for large feeds.
+        """
+        conn = get_connection(self.db_path)
+        if defer_indexes:
+            with conn:
+                conn.executescript(DROP_DEFERRABLE_INDEXES)
+
+        total = 0
+        try:
+            batch = []
+            for job_data in jobs:
+                batch.append(job_data)
+                if len(batch) >= batch_size:
+                    with conn:
+                        self._upsert_batch(conn, batch)
+                    total += len(batch)
+                    batch = []
+                    if on_progress is not None:
+                        on_progress(total)
+            if batch:
+                with conn:
+                    self._upsert_batch(conn, batch)
+                total += len(batch)
+                if on_progress is not None:
+                    on_progress(total)
+        finally:
+            if defer_indexes:
+                print("JobDatabase: rebuilding indexes and full-text index...")
+                with conn:
+                    conn.executescript(CREATE_DEFERRABLE_INDEXES)
+                    conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+                with open(self.schema_path, "r") as f:
+                    # Recreates the full-text triggers
+                    conn.executescript(f.read())
+            # The in-memory matcher index rebuilds lazily on the next search
+            invalidate_job_index(self.db_path)
+
+        return total
+
+    def rebuild_requirement_tokens(self):
+        """ Re-canonicalize every job's requirement tokens, e.g. after editing the skill taxonomy. """
+        conn = get_connection(self.db_path)
+        with conn:
+            fill_job_requirements(conn)
+        invalidate_job_index(self.db_path)
+
+    def _upsert_batch(self, conn, batch: List[Dict[str, Any]]) -> List[int]:
+        """ Upsert one batch inside the caller's transaction and return the job IDs. """
+        rows = [
+            (
                 job_data.get("title"),
                 job_data.get("company"),
                 job_data.get("location"),
@@ -44,14 +153,49 @@ class JobDatabase:
                 job_data.get("description"),
                 json.dumps(job_data.get("requirements")),
                 json.dumps(job_data.get("benefits"))
-            ))
-            conn.commit()
-            return cursor.lastrowid
+            )
+            for job_data in batch
+        ]
+        # RETURNING yields the id only when the row was inserted or actually changed
+        changed: Dict[int, Dict[str, Any]] = {}  # job id -> its latest data in this batch
+        job_ids: List[Optional[int]] = []
+        for row, job_data in zip(rows, batch):
+            hit = conn.execute(UPSERT_JOB_RETURNING_QUERY, row).fetchone()
+            if hit is not None:
+                changed[hit[0]] = job_data
+            job_ids.append(hit[0] if hit is not None else None)
+
+        unchanged = [i for i, job_id in enumerate(job_ids) if job_id is None]
+        if unchanged:
+            # One keyed lookup per chunk for the rows the upsert left alone
+            existing = {}
+            for start in range(0, len(unchanged), 300):
+                keys = [rows[i][:3] for i in unchanged[start:start + 300]]
+                values = ",".join("(?, ?, ?)" for _ in keys)
+                for row in conn.execute(
+                    f"SELECT jobs.id, jobs.title, jobs.company, jobs.location FROM (VALUES {values}) AS k "
+                    "JOIN jobs ON jobs.title = k.column1 AND jobs.company = k.column2 AND jobs.location = k.column3",
+                    [value for key in keys for value in key],
+                ):
+                    existing[tuple(row[1:])] = row[0]
+            for i in unchanged:
+                job_ids[i] = existing[rows[i][:3]]
+
+        conn.executemany("DELETE FROM job_requirements WHERE job_id = ?", [(job_id,) for job_id in changed])
+        conn.executemany(
+            "INSERT OR IGNORE INTO job_requirements (job_id, token) VALUES (?, ?)",
+            [
+                (job_id, token)
+                for job_id, job_data in changed.items()
+                for token in requirement_tokens(job_data.get("requirements"))
+            ],
+        )
+        return job_ids
         
     def get_all_jobs(self) -> List[Dict[str, Any]]:
         """ Retrieve all jobs from the database. """
         query = "SELECT * FROM jobs"
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             cursor = conn.cursor()
             cursor.execute(query)
             rows = cursor.fetchall()
@@ -71,51 +215,77 @@ class JobDatabase:
                 }
                 jobs.append(job)
             return jobs
-        
 
-        def search_jobs(self, skills: List[str], experience_level: str) -> List[Dict[str, Any]]:
-            """ Search jobs based on skills and experience level. """
-            query  = """
-                    SELECT * FROM jobs WHERE experience_level = ? 
-                    AND
-                     (
-                     """
-            query_conditions = []
-            params = [experience_level]
-
-            # Create LIKE conditions for each skill
-            for skill in skills:
-                query_conditions.append("requirements LIKE ?")
-                params.append(f"%{skill}%")
-
-            query += "OR ".join(query_conditions) + ")"
-
-
-            try:
-                with sqlite3.connect(self.db.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    cursor.execute(query, params)
-                    rows = cursor.fetchall()
-
-                    return [
-                        {
-                            "id": row["id"],
-                            "title": row["title"],
-                            "company": row["company"],
-                            "location": row["location"],
-                            "type": row["type"],
-                            "experience_level": row["experience_level"],
-                            "salary_range": row["salary_range"],
-                            "description": row["description"],
-                            "requirements": json.loads(row["requirements"]),
-                            "benefits": (
-                                json.loads(row["benefits"]) if row["benefits"] else []
-                            ),
-                        }
-                        for row in rows
-                    ]
-            except Exception as e:
-                print(f"Error searching jobs: {e}")
-                return []
-            
+    def search_jobs(self, skills: List[str], experience_level: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """ Rank jobs at an experience level by BM25 over the full-text index, best first. """
+        match_query = self._fts_query(skills)
+        if not match_query:
+            return []
+
+        # bm25() is lower-is-better; weight requirements above title above description
+        query = """
+                SELECT jobs.*, bm25(jobs_fts, 2.0, 1.0, 4.0) AS rank
+                FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid
+                WHERE jobs_fts MATCH ? AND jobs.experience_level = ?
+                ORDER BY rank
+                LIMIT ?"""
+
+        try:
+            with get_connection(self.db_path) as conn:
+                rows = conn.execute(query, (match_query, experience_level, limit)).fetchall()
+
+                return [
+                    {
+                        "id": row["id"],
+                        "title": row["title"],
+                        "company": row["company"],
+                        "location": row["location"],
+                        "type": row["type"],
+                        "experience_level": row["experience_level"],
+                        "salary_range": row["salary_range"],
+                        "description": row["description"],
+                        "requirements": json.loads(row["requirements"]),
+                        "benefits": (
+                            json.loads(row["benefits"]) if row["benefits"] else []
+                        ),
+                        "bm25_score": -row["rank"],
+                    }
+                    for row in rows
+                ]
+        except Exception as e:
+            print(f"Error searching jobs: {e}")
+            return []
+
+    def count_overlaps(self, tokens: List[str], experience_level: str) -> List[Dict[str, Any]]:
+        """ Count requirement tokens each job shares with tokens, as one indexed GROUP BY.
+
+        Returns job_id, overlap and total (the job's number of requirement tokens)
+        for every job at experience_level with at least one shared token.
+        """
+        tokens = list(set(tokens))
+        if not tokens:
+            return []
+
+        placeholders = ",".join("?" * len(tokens))
+        query = f"""
+                SELECT r.job_id, COUNT(*) AS overlap,
+                       (SELECT COUNT(*) FROM job_requirements t WHERE t.job_id = r.job_id) AS total
+                FROM job_requirements r JOIN jobs j ON j.id = r.job_id
+                WHERE r.token IN ({placeholders}) AND j.experience_level = ?
+                GROUP BY r.job_id"""
+
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute(query, (*tokens, experience_level)).fetchall()
+        return [{"job_id": job_id, "overlap": overlap, "total": total} for job_id, overlap, total in rows]
+
+    @staticmethod
+    def _fts_query(skills: List[str]) -> str:
+        """ Build an FTS5 OR-query of quoted skill phrases and words. """
+        terms = set()
+        for skill in skills:
+            terms.update(tokenize(skill))
+            # The full-text index holds the raw text, so search every alias of a known skill
+            for canonical in canonical_skills([skill]):
+                terms.update(skill_aliases(canonical))
+        # Quote every term so FTS5 syntax characters in skills are taken literally
+        return " OR ".join('"' + t.replace('"', '""') + '"' for t in sorted(terms))
@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator
+import argparse
+import csv
+import json
+import sys
+import time
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.database import JobDatabase
+
+
+LIST_FIELDS = ("requirements", "benefits")
+
+
+def _parse_list(value: Any) -> list:
+    """CSV cells hold either a JSON array or a ';'-separated list"""
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+
+def read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_number}: {e}")
+
+
+def read_csv(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            for field in LIST_FIELDS:
+                row[field] = _parse_list(row.get(field))
+            yield row
+
+
+def import_jobs(path: Path, file_format: str = None, batch_size: int = 5000, db_path: Path = None) -> int:
+    """Stream a JSONL or CSV job feed into the database"""
+    file_format = file_format or path.suffix.lstrip(".").lower()
+    readers = {"jsonl": read_jsonl, "json": read_jsonl, "csv": read_csv}
+    if file_format not in readers:
+        raise ValueError(f"Unsupported feed format: {file_format}")
+
+    db = JobDatabase(db_path)
+    start = time.perf_counter()
+
+    def report(count: int):
+        elapsed = time.perf_counter() - start
+        print(f"Imported {count:,} jobs ({count / elapsed:,.0f} jobs/s)")
+
+    total = db.add_jobs(
+        readers[file_format](path),
+        batch_size=batch_size,
+        defer_indexes=True,
+        on_progress=report,
+    )
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0
+    print(f"Done: {total:,} jobs in {elapsed:.1f}s ({rate:,.0f} jobs/s, including index rebuild)")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a job feed (JSONL or CSV)")
+    parser.add_argument("path", type=Path, help="Path to the .jsonl or .csv feed")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Feed format (default: file extension)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Jobs per transaction")
+    parser.add_argument("--db", type=Path, help="Database file (default: db/jobs.db)")
+    args = parser.parse_args()
+
+    import_jobs(args.path, args.format, args.batch_size, args.db)
@@ -0,0 +1,348 @@
+import bisect
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from db.connection import get_connection
+from utils.skill_taxonomy import CANONICALIZE_CACHE_SIZE, canonicalize
+
+
+# Past this many job changes since the last refresh, rebuilding beats applying them
+CATCH_UP_MAX_CHANGES = 5000
+
+
+@lru_cache(maxsize=CANONICALIZE_CACHE_SIZE)
+def tokenize(text: str) -> frozenset:
+    """Normalize and tokenize a skill or requirement string into a set of tokens.
+
+    - Lowercases and rewrites known skill aliases to canonical ids (utils.skill_taxonomy)
+    - Replaces common separators with commas
+    - Removes punctuation and extraneous characters
+    - Returns both full-phrase tokens and word-level tokens for flexible matching
+    """
+    if not text:
+        return frozenset()
+    s = canonicalize(text)
+    # Normalize common separators
+    for sep in ["/", "&", "|", ";", "(", ")", ".", "-", "_"]:
+        s = s.replace(sep, ",")
+    s = s.replace(" and ", ",")
+    parts = [p.strip() for p in re.split(r"[,\n]+", s) if p.strip()]
+    tokens = set()
+    for part in parts:
+        # remove non-alphanumeric except space
+        part_clean = re.sub(r"[^a-z0-9 ]+", " ", part).strip()
+        if not part_clean:
+            continue
+        part_clean = " ".join(part_clean.split())
+        tokens.add(part_clean)
+        # add individual words as tokens
+        for w in part_clean.split():
+            tokens.add(w)
+    return frozenset(tokens)
+
+
+def requirement_tokens(requirements: Iterable[str]) -> frozenset:
+    tokens = set()
+    for r in requirements or []:
+        tokens.update(tokenize(r))
+    return frozenset(tokens)
+
+
+def tokens_match(requirement_token: str, candidate_token: str) -> bool:
+    """Equal, either contains the other, or they share a word"""
+    rt, ct = requirement_token, candidate_token
+    if rt == ct or rt in ct or ct in rt:
+        return True
+    return bool(set(rt.split()).intersection(ct.split()))
+
+
+def match_pct(candidate_tokens: Set[str], req_tokens: Iterable[str]) -> Tuple[int, int]:
+    """Score one job directly: (overlapping requirement tokens, match percentage)"""
+    req_tokens = list(req_tokens)
+    if not req_tokens:
+        return 0, 0
+    overlap = sum(1 for rt in req_tokens if any(tokens_match(rt, ct) for ct in candidate_tokens))
+    return overlap, int(round(overlap / len(req_tokens) * 100))
+
+
+def normalize_experience_level(raw: Optional[str]) -> Optional[str]:
+    """Map a free-text experience level onto the jobs table values (None if unknown)"""
+    el = (raw or "").lower()
+    if "senior" in el:
+        return "Senior"
+    if "mid" in el:
+        return "Mid-level"
+    if "entry" in el:
+        return "Entry-level"
+    if "junior" in el:
+        return "Junior"
+    return None
+
+
+class TokenIndex:
+    """Token -> posting lists per experience level, with tokens_match lookups.
+
+    tokens_match is symmetric, so the same vocabulary lookup serves both
+    directions: a candidate's tokens against job requirements (JobIndex) and a
+    job's requirement tokens against candidate profiles (CandidateIndex).
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._item_tokens: Dict[int, frozenset] = {}
+        self._item_level: Dict[int, str] = {}
+        # experience_level -> token -> item ids
+        self._postings: Dict[str, Dict[str, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self._word_index: Dict[str, Set[str]] = defaultdict(set)
+        self._vocab: Set[str] = set()
+        self._vocab_blob: Optional[str] = None
+        self._vocab_starts: List[int] = []
+        self._vocab_sorted: List[str] = []
+        self._match_cache: Dict[str, frozenset] = {}
+        self.version = 0  # bumped on every change so derived structures can rebuild
+
+    def _clear(self):
+        self._item_tokens.clear()
+        self._item_level.clear()
+        self._postings.clear()
+        self._word_index.clear()
+        self._vocab.clear()
+
+    def _remove(self, item_id: int):
+        tokens = self._item_tokens.pop(item_id, None)
+        if tokens is None:
+            return
+        level_postings = self._postings[self._item_level.pop(item_id)]
+        for token in tokens:
+            level_postings[token].discard(item_id)
+
+    def _add(self, item_id: int, experience_level: str, tokens: frozenset):
+        # Items without tokens can never be scored
+        if not tokens:
+            return
+        self._item_tokens[item_id] = tokens
+        self._item_level[item_id] = experience_level
+        level_postings = self._postings[experience_level]
+        for token in tokens:
+            level_postings[token].add(item_id)
+            if token not in self._vocab:
+                self._vocab.add(token)
+                for word in token.split():
+                    self._word_index[word].add(token)
+
+    def snapshot(self) -> Tuple[int, List[str], Dict[int, Tuple[str, frozenset]]]:
+        """(version, sorted vocabulary, {item_id: (experience_level, tokens)}), read under the lock"""
+        with self._lock:
+            items = {item_id: (self._item_level[item_id], tokens) for item_id, tokens in self._item_tokens.items()}
+            return self.version, sorted(self._vocab), items
+
+    def _invalidate_vocab(self):
+        self.version += 1
+        self._vocab_blob = None
+        self._match_cache.clear()
+
+    def _ensure_vocab_blob(self):
+        # All vocabulary tokens joined by NUL, so `token in vocab_token` becomes one str.find sweep
+        if self._vocab_blob is None:
+            self._vocab_sorted = sorted(self._vocab)
+            self._vocab_starts = []
+            offset = 0
+            for token in self._vocab_sorted:
+                self._vocab_starts.append(offset)
+                offset += len(token) + 1
+            self._vocab_blob = "\0".join(self._vocab_sorted)
+
+    def _matching_vocab(self, query_token: str) -> frozenset:
+        """All vocabulary tokens that tokens_match query_token"""
+        cached = self._match_cache.get(query_token)
+        if cached is not None:
+            return cached
+
+        matched = set()
+        if query_token in self._vocab:
+            matched.add(query_token)
+        # vocabulary token inside query token
+        n = len(query_token)
+        for i in range(n):
+            for j in range(i + 1, n + 1):
+                if query_token[i:j] in self._vocab:
+                    matched.add(query_token[i:j])
+        # query token inside vocabulary token
+        blob = self._vocab_blob
+        pos = blob.find(query_token)
+        while pos != -1:
+            k = bisect.bisect_right(self._vocab_starts, pos) - 1
+            matched.add(self._vocab_sorted[k])
+            next_start = self._vocab_starts[k + 1] if k + 1 < len(self._vocab_starts) else len(blob)
+            pos = blob.find(query_token, next_start)
+        # shared word
+        for word in query_token.split():
+            matched.update(self._word_index.get(word, ()))
+
+        result = frozenset(matched)
+        self._match_cache[query_token] = result
+        return result
+
+    def matched_tokens(self, query_tokens: Set[str]) -> Set[str]:
+        """Every token in the vocabulary that some query token matches"""
+        with self._lock:
+            self._ensure_vocab_blob()
+            matched = set()
+            for token in query_tokens:
+                matched.update(self._matching_vocab(token))
+            return matched
+
+
+class JobIndex(TokenIndex):
+    """Token -> job posting lists over the jobs table, kept in memory.
+
+    A requirement token counts as matched by the candidate when it equals a
+    candidate token, one contains the other, or they share a word - the same
+    rule MatcherAgent has always used. Matched tokens are resolved against the
+    vocabulary once per search, so only jobs sharing a matched token are scored.
+    """
+
+    def __init__(self, db_path: Path):
+        super().__init__(db_path)
+        self.change_seq = 0  # the job change feed is applied up to here
+
+    def build(self):
+        """(Re)load every job's requirement tokens from the database"""
+        with self._lock:
+            self._clear()
+            # Tokens were canonicalized once at insert time (job_requirements)
+            job_tokens = defaultdict(set)
+            with get_connection(self.db_path) as conn:
+                # Read first: a write landing during the load is applied again by catch_up
+                self.change_seq = last_job_change(conn)
+                for job_id, token in conn.execute("SELECT job_id, token FROM job_requirements"):
+                    job_tokens[job_id].add(token)
+                for job_id, experience_level in conn.execute("SELECT id, experience_level FROM jobs"):
+                    self._add(job_id, experience_level, frozenset(job_tokens.pop(job_id, ())))
+            self._invalidate_vocab()
+
+    def catch_up(self):
+        """Apply the job changes logged since the index was built, from any process.
+
+        Rebuilds instead when the feed no longer reaches back that far (the
+        re-matcher prunes what it has consumed) or when the backlog is large.
+        """
+        with self._lock:
+            with get_connection(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT seq, job_id FROM job_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (self.change_seq, CATCH_UP_MAX_CHANGES + 1),
+                ).fetchall()
+                if not rows or rows[0][0] != self.change_seq + 1 or len(rows) > CATCH_UP_MAX_CHANGES:
+                    stale = True
+                else:
+                    stale = False
+                    job_ids = sorted({job_id for _, job_id in rows})
+                    current = {}
+                    for i in range(0, len(job_ids), 500):
+                        chunk = job_ids[i:i + 500]
+                        placeholders = ",".join("?" * len(chunk))
+                        for job_id, experience_level, requirements in conn.execute(
+                            f"SELECT id, experience_level, requirements FROM jobs WHERE id IN ({placeholders})", chunk
+                        ):
+                            try:
+                                reqs = json.loads(requirements) if requirements else []
+                            except Exception:
+                                reqs = []
+                            current[job_id] = (experience_level, reqs)
+            if stale:
+                self.build()  # the lock is re-entrant
+                return
+            # From the requirements column: job_requirements may lag behind plain UPDATEs
+            for job_id in job_ids:
+                self._remove(job_id)
+                if job_id in current:
+                    experience_level, reqs = current[job_id]
+                    self._add(job_id, experience_level, requirement_tokens(reqs))
+            self.change_seq = rows[-1][0]
+            self._invalidate_vocab()
+
+    def add_job(self, job_id: int, experience_level: str, requirements: Iterable[str]):
+        """Index one newly written (or updated) job"""
+        with self._lock:
+            self._remove(job_id)
+            self._add(job_id, experience_level, requirement_tokens(requirements))
+            self._invalidate_vocab()
+
+    def remove_job(self, job_id: int):
+        """Drop a deleted job from the index"""
+        with self._lock:
+            self._remove(job_id)
+            self._invalidate_vocab()
+
+    def score(self, candidate_tokens: Set[str], experience_level: str) -> List[Tuple[int, int]]:
+        """Return (job_id, match_pct) for every job at this level sharing a matched token"""
+        with self._lock:
+            level_postings = self._postings.get(experience_level, {})
+            if not candidate_tokens:
+                # Keep the old behaviour: with no skills every job is listed at 0%
+                job_ids = set()
+                for ids in level_postings.values():
+                    job_ids.update(ids)
+                return [(job_id, 0) for job_id in job_ids]
+
+            matched_tokens = self.matched_tokens(candidate_tokens)
+            overlaps = Counter()
+            for token in matched_tokens:
+                overlaps.update(level_postings.get(token, ()))
+
+            return [
+                (job_id, int(round(overlap / len(self._item_tokens[job_id]) * 100)))
+                for job_id, overlap in overlaps.items()
+            ]
+
+
+def last_job_change(conn) -> int:
+    """The newest seq in the job change feed (it survives pruning), 0 before any change"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'job_changes'").fetchone()
+    return row[0] if row else 0
+
+
+_indexes: Dict[str, JobIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_job_index(db_path: Path) -> JobIndex:
+    """Return the process-wide index for db_path, building it on first use.
+
+    Writes from any process (inserts, updates of requirements or level,
+    deletes) are picked up through the job change feed's newest seq.
+    """
+    key = str(db_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = JobIndex(db_path)
+            index.build()
+            _indexes[key] = index
+            return index
+
+    with get_connection(db_path) as conn:
+        seq = last_job_change(conn)
+    if seq != index.change_seq:
+        index.catch_up()
+    return index
+
+
+def invalidate_job_index(db_path: Path):
+    """Drop the cached index so the next search rebuilds it (after bulk writes)"""
+    with _indexes_lock:
+        _indexes.pop(str(db_path), None)
+
+
+def notify_job_added(db_path: Path, job_id: int, experience_level: str, requirements: Iterable[str]):
+    """Keep an already-built index in sync with JobDatabase.add_job"""
+    index = _indexes.get(str(db_path))
+    if index is not None:
+        index.add_job(job_id, experience_level, requirements)
@@ -0,0 +1,123 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np  # pip install numpy
+except ImportError:  # the vectorized matcher is optional
+    np = None
+
+from db.job_index import JobIndex
+
+
+class JobMatrix:
+    """Sparse job x token matrix (CSR, one per experience level) built from a JobIndex.
+
+    A candidate becomes a 0/1 vector over the requirement vocabulary (the tokens
+    it matches), so every job's overlap is one sparse matrix-vector product and
+    match_pct follows exactly as in JobIndex.score. Several candidates can be
+    scored at once by stacking their vectors into a matrix.
+    """
+
+    def __init__(self, index: JobIndex):
+        if np is None:
+            raise ImportError("numpy is required for the vectorized matcher")
+
+        self.version, vocab, items = index.snapshot()
+        jobs_by_level = defaultdict(list)
+        for job_id, (level, tokens) in items.items():
+            jobs_by_level[level].append((job_id, tokens))
+
+        self.index = index
+        self.token_ids: Dict[str, int] = {token: i for i, token in enumerate(vocab)}
+        self._levels = {}
+        for level, jobs in jobs_by_level.items():
+            jobs.sort(key=lambda job: job[0])
+            lengths = np.fromiter((len(tokens) for _, tokens in jobs), dtype=np.int64, count=len(jobs))
+            indptr = np.zeros(len(jobs) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            indices = np.fromiter(
+                (self.token_ids[t] for _, tokens in jobs for t in tokens),
+                dtype=np.int64,
+                count=int(indptr[-1]),
+            )
+            job_ids = np.fromiter((job_id for job_id, _ in jobs), dtype=np.int64, count=len(jobs))
+            self._levels[level] = (job_ids, lengths, indptr, indices)
+
+    def candidate_matrix(self, matched_token_sets: Sequence[Set[str]]) -> "np.ndarray":
+        """Encode candidates as a vocab x candidates 0/1 matrix"""
+        matrix = np.zeros((len(self.token_ids), len(matched_token_sets)), dtype=np.uint8)
+        for column, tokens in enumerate(matched_token_sets):
+            rows = [self.token_ids[t] for t in tokens if t in self.token_ids]
+            matrix[rows, column] = 1
+        return matrix
+
+    def score_matrix(
+        self, matched_token_sets: Sequence[Set[str]], experience_level: str
+    ) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Return (job_ids, overlaps, match_pct) for every job at the level.
+
+        overlaps and match_pct have shape (jobs, candidates).
+        """
+        level = self._levels.get(experience_level)
+        if level is None:
+            empty = np.zeros((0, len(matched_token_sets)), dtype=np.int64)
+            return np.zeros(0, dtype=np.int64), empty, empty
+        job_ids, lengths, indptr, indices = level
+
+        candidates = self.candidate_matrix(matched_token_sets)
+        # Row-wise sums of the gathered candidate entries == A @ X for a 0/1 CSR matrix A
+        overlaps = np.add.reduceat(candidates[indices], indptr[:-1], axis=0, dtype=np.int64)
+        match_pct = np.rint(overlaps / lengths[:, None] * 100).astype(np.int64)
+        return job_ids, overlaps, match_pct
+
+    def top_k(
+        self, matched_token_sets: Sequence[Set[str]], experience_level: str, k: Optional[int] = None
+    ) -> List[List[Tuple[int, int]]]:
+        """Best (job_id, match_pct) per candidate among jobs with any overlap.
+
+        Results are ordered by match_pct, then job id. k=None keeps every job.
+        """
+        job_ids, overlaps, match_pct = self.score_matrix(matched_token_sets, experience_level)
+        results = []
+        for column in range(len(matched_token_sets)):
+            hits = np.flatnonzero(overlaps[:, column])
+            results.append(self._select(job_ids, hits, match_pct[hits, column], k))
+        return results
+
+    def best(
+        self, matched_tokens: Set[str], experience_level: str, k: int, min_pct: int = 0
+    ) -> Tuple[List[Tuple[int, int]], int]:
+        """(best k (job_id, match_pct), number of jobs scoring at least min_pct) for one candidate"""
+        job_ids, overlaps, match_pct = self.score_matrix([matched_tokens], experience_level)
+        hits = np.flatnonzero((overlaps[:, 0] > 0) & (match_pct[:, 0] >= min_pct))
+        return self._select(job_ids, hits, match_pct[hits, 0], k), len(hits)
+
+    @staticmethod
+    def _select(
+        job_ids: "np.ndarray", hits: "np.ndarray", pct: "np.ndarray", k: Optional[int]
+    ) -> List[Tuple[int, int]]:
+        # argpartition narrows to the top k before sorting; only those few are sorted
+        if k is not None and len(hits) > k:
+            # Keep everything tied with the k-th score so the id tie-break stays exact
+            kth = pct[np.argpartition(pct, len(pct) - k)[len(pct) - k]]
+            keep = pct >= kth
+            hits, pct = hits[keep], pct[keep]
+        order = np.lexsort((job_ids[hits], -pct))
+        if k is not None:
+            order = order[:k]
+        return [(int(job_ids[hits[i]]), int(pct[i])) for i in order]
+
+
+_matrices: Dict[int, JobMatrix] = {}
+_matrices_lock = threading.Lock()
+
+
+def get_job_matrix(index: JobIndex) -> JobMatrix:
+    """Return the matrix for index, rebuilding it when the index has changed"""
+    with _matrices_lock:
+        matrix = _matrices.get(id(index))
+        if matrix is None or matrix.index is not index or matrix.version != index.version:
+            matrix = JobMatrix(index)
+            _matrices[id(index)] = matrix
+        return matrix
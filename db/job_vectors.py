@@ -0,0 +1,316 @@
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # pip install numpy
+except ImportError:  # semantic matching is optional
+    np = None
+
+from db.connection import get_connection
+
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_DESCRIPTION_CHARS = 1000
+VECTOR_COMPACT_MIN_ROWS = 10000  # superseded rows tolerated before compacting
+VECTOR_COMPACT_CHUNK_ROWS = 8192
+
+
+def job_text(title: str, requirements: List[str], description: str) -> str:
+    """The text embedded for one job"""
+    parts = [title or ""]
+    if requirements:
+        parts.append("Requirements: " + ", ".join(requirements))
+    if description:
+        parts.append(description[:EMBED_DESCRIPTION_CHARS])
+    return "\n".join(parts)
+
+
+def candidate_text(skills: List[str], experience_level: str) -> str:
+    """The query text embedded for one candidate"""
+    return f"{experience_level} candidate. Skills: {', '.join(skills)}"
+
+
+class JobVectorStore:
+    """Unit-normalized float32 job embeddings, memory-mapped from files next to jobs.db.
+
+    jobs.vectors.f32 holds one row per embedding and jobs.vectors.ids the matching
+    job ids (int64), both append-only, so new jobs are embedded without touching the
+    rows already on disk. An edited job gets a fresh row that supersedes its old one
+    and a deleted job a row with the negated id; once superseded rows outnumber live
+    ones the live rows are rewritten into the next generation of files.
+    jobs.vectors.json records the model, dimension, file generation and when the
+    store was last synced; a different embedding model starts the store over.
+    Because rows are normalized, cosine similarity is a plain matrix-vector product
+    over the memmap.
+    """
+
+    def __init__(self, db_path: Path):
+        if np is None:
+            raise ImportError("numpy is required for semantic matching")
+        db_path = Path(db_path)
+        self.db_path = db_path
+        self.meta_path = db_path.with_suffix(".vectors.json")
+        self._lock = threading.Lock()
+        self._meta: Dict[str, object] = {}
+        self._state = None
+        self._vectors = None
+        self._ids = None
+        self._row_of: Dict[int, int] = {}
+        self._live_rows = None
+        self._max_id = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _paths(self, generation: int) -> Tuple[Path, Path]:
+        prefix = ".vectors" if generation == 0 else f".vectors.{generation}"
+        return self.db_path.with_suffix(prefix + ".f32"), self.db_path.with_suffix(prefix + ".ids")
+
+    @property
+    def vectors_path(self) -> Path:
+        return self._paths(int(self._meta.get("generation", 0)))[0]
+
+    @property
+    def ids_path(self) -> Path:
+        return self._paths(int(self._meta.get("generation", 0)))[1]
+
+    def _file_state(self) -> Tuple[int, int]:
+        try:
+            meta_mtime = self.meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0, 0
+        try:
+            return meta_mtime, self.ids_path.stat().st_size
+        except FileNotFoundError:
+            return meta_mtime, 0
+
+    def _write_meta(self, meta: Dict[str, object]):
+        # Readers in other processes never see a half-written file
+        tmp_path = self.meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.meta_path)
+        self._meta = meta
+
+    def _load(self):
+        self._meta = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+        self._state = self._file_state()
+        vectors, ids, row_of, live_rows, max_id = None, None, {}, None, 0
+        dim = self._meta.get("dim")
+        # An interrupted append can leave one file longer than the other
+        rows = 0
+        if dim and self.vectors_path.exists() and self.ids_path.exists():
+            rows = min(
+                self.vectors_path.stat().st_size // (4 * dim),
+                self.ids_path.stat().st_size // 8,
+            )
+        if rows:
+            vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+            ids = np.fromfile(self.ids_path, dtype=np.int64, count=rows)
+            # Later rows win: a re-embedded job replaces its old row, a negated id drops it
+            for row, job_id in enumerate(ids.tolist()):
+                if job_id < 0:
+                    row_of.pop(-job_id, None)
+                else:
+                    row_of[job_id] = row
+            live_rows = np.fromiter(sorted(row_of.values()), dtype=np.int64, count=len(row_of))
+            max_id = int(np.abs(ids).max())
+        # Searches running meanwhile keep using the previous arrays until this swap
+        self._vectors, self._ids, self._row_of, self._live_rows, self._max_id = vectors, ids, row_of, live_rows, max_id
+
+    def _refresh(self):
+        """Reload if this or another process appended or compacted since the last load"""
+        if self._file_state() != self._state:
+            self._load()
+
+    def _reset(self, model: str, dim: int):
+        for path in (self.vectors_path, self.ids_path):
+            path.unlink(missing_ok=True)
+        self._write_meta({"model": model, "dim": dim})
+        self._load()
+
+    def missing_jobs(self, model: str) -> Tuple[List[Tuple[int, str]], List[int], Dict[str, object]]:
+        """What the store lacks for model: (job_id, text) to embed, job ids to drop, and the sync marker.
+
+        Jobs to embed are those added above the highest stored id and those whose
+        updated_at is not older than the last sync. Deleted jobs are only looked for
+        when the job count no longer matches the store. The marker goes to
+        mark_synced once everything is stored.
+        """
+        with self._lock:
+            self._refresh()
+        same_model = self._meta.get("model") == model and bool(self._meta.get("dim"))
+        last_id = self._max_id if same_model else 0
+        synced_at = self._meta.get("synced_at") if same_model else None
+        stored = self._row_of if same_model else {}
+        # updated_at has one-second resolution, so jobs stamped with the second of the
+        # last sync are read again; those whose text is unchanged since are skipped
+        edge = self._meta.get("synced_edge", {}) if same_model else {}
+
+        columns = "SELECT id, title, requirements, description, updated_at FROM jobs"
+        with get_connection(self.db_path) as conn:
+            as_of = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            rows = conn.execute(f"{columns} WHERE id > ?", (last_id,)).fetchall()
+            if synced_at:
+                # Two queries so each uses its index; a UNION scans the table
+                seen = {row["id"] for row in rows}
+                rows += [
+                    row for row in conn.execute(f"{columns} WHERE updated_at >= ?", (synced_at,))
+                    if row["id"] not in seen
+                ]
+
+            deleted: List[int] = []
+            if stored:
+                new = sum(1 for row in rows if row["id"] not in stored)
+                if conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] != len(stored) + new:
+                    current = {job_id for (job_id,) in conn.execute("SELECT id FROM jobs")}
+                    deleted = sorted(set(stored) - current)
+                    # Jobs an interrupted sync never stored
+                    unseen = sorted(current - set(stored) - {row["id"] for row in rows})
+                    for i in range(0, len(unseen), 500):
+                        chunk = unseen[i:i + 500]
+                        rows += conn.execute(
+                            f"{columns} WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                        ).fetchall()
+
+        missing = []
+        next_edge = {}
+        for row in rows:
+            try:
+                reqs = json.loads(row["requirements"]) if row["requirements"] else []
+            except Exception:
+                reqs = []
+            text = job_text(row["title"], reqs, row["description"])
+            checksum = zlib.crc32(text.encode())
+            if row["updated_at"] and row["updated_at"] >= as_of:
+                next_edge[str(row["id"])] = checksum
+            if row["id"] in stored and edge.get(str(row["id"])) == checksum:
+                continue
+            missing.append((row["id"], text))
+        return missing, deleted, {"synced_at": as_of, "synced_edge": next_edge}
+
+    def append(self, model: str, job_ids: List[int], vectors: List[List[float]]):
+        """Normalize and append vectors; each supersedes any earlier row for its job"""
+        if not job_ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._refresh()
+            if self._meta.get("model") != model or self._meta.get("dim") != matrix.shape[1]:
+                print(f"JobVectorStore: starting a new store for {model} ({matrix.shape[1]} dims)")
+                self._reset(model, matrix.shape[1])
+            self._write_rows(job_ids, matrix)
+
+    def delete(self, job_ids: List[int]):
+        """Drop the vectors of deleted jobs"""
+        with self._lock:
+            self._refresh()
+            job_ids = [job_id for job_id in job_ids if job_id in self._row_of]
+            if not job_ids:
+                return
+            matrix = np.zeros((len(job_ids), self._meta["dim"]), dtype=np.float32)
+            self._write_rows([-job_id for job_id in job_ids], matrix)
+
+    def _write_rows(self, job_ids: List[int], matrix):
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(matrix).tobytes())
+        with open(self.ids_path, "ab") as f:
+            f.write(np.asarray(job_ids, dtype=np.int64).tobytes())
+        self._load()
+        dead = len(self._ids) - len(self._row_of)
+        if dead >= VECTOR_COMPACT_MIN_ROWS and dead > len(self._row_of):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite only the live rows into the next generation of files"""
+        generation = int(self._meta.get("generation", 0)) + 1
+        vectors_path, ids_path = self._paths(generation)
+        old_paths = (self.vectors_path, self.ids_path)
+        rows = self._live_rows
+        with open(vectors_path, "wb") as f:
+            for i in range(0, len(rows), VECTOR_COMPACT_CHUNK_ROWS):
+                f.write(np.ascontiguousarray(self._vectors[rows[i:i + VECTOR_COMPACT_CHUNK_ROWS]]).tobytes())
+        self._ids[rows].tofile(ids_path)
+        # The meta file names the current generation, so switching is one atomic rename
+        self._write_meta({**self._meta, "generation": generation})
+        for path in old_paths:
+            path.unlink(missing_ok=True)
+        print(f"JobVectorStore: compacted {len(self._ids)} rows to {len(rows)}")
+        self._load()
+
+    def mark_synced(self, model: str, marker: Dict[str, object]):
+        """Record the marker from missing_jobs once everything it listed is stored for model"""
+        with self._lock:
+            if self._meta.get("model") == model:
+                self._write_meta({**self._meta, **marker})
+                # Not a reason to reload, but rows other processes appended still are
+                self._state = (self.meta_path.stat().st_mtime_ns, self._state[1])
+
+    async def sync(self, model: Optional[str] = None) -> int:
+        """Embed jobs added or edited since the last sync, drop deleted ones, and return how many were embedded"""
+        import asyncio
+        from utils.llm_client import OLLAMA_EMBED_MODEL, embed_texts
+
+        model = model or OLLAMA_EMBED_MODEL
+        missing, deleted, marker = await asyncio.to_thread(self.missing_jobs, model)
+        for i in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[i:i + EMBED_BATCH_SIZE]
+            vectors = await embed_texts([text for _, text in batch], model=model)
+            await asyncio.to_thread(self.append, model, [job_id for job_id, _ in batch], vectors)
+        if deleted:
+            await asyncio.to_thread(self.delete, deleted)
+        # Only once everything is stored, so a failed batch is retried next time
+        await asyncio.to_thread(self.mark_synced, model, marker)
+        if missing or deleted:
+            print(f"JobVectorStore: embedded {len(missing)} new or edited jobs, "
+                  f"dropped {len(deleted)} deleted ({len(self)} total)")
+        return len(missing)
+
+    def _scores(self, query_vector: List[float], job_ids: Optional[List[int]]):
+        vectors, ids, row_of, live_rows = self._vectors, self._ids, self._row_of, self._live_rows
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if vectors is None or norm == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query /= norm
+        if job_ids is None:
+            if len(live_rows) == len(ids):
+                return ids, vectors @ query
+            return ids[live_rows], vectors[live_rows] @ query
+        rows = np.fromiter((row_of[j] for j in job_ids if j in row_of), dtype=np.int64)
+        rows.sort()  # sequential reads over the memmap
+        return ids[rows], vectors[rows] @ query
+
+    def similarities(self, query_vector: List[float], job_ids: Optional[List[int]] = None) -> Dict[int, float]:
+        """Cosine similarity of query_vector to every stored job (or to job_ids only)"""
+        ids, scores = self._scores(query_vector, job_ids)
+        return dict(zip(ids.tolist(), scores.tolist()))
+
+    def top_k(self, query_vector: List[float], k: int, job_ids: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+        """The k most similar (job_id, cosine) pairs, best first"""
+        ids, scores = self._scores(query_vector, job_ids)
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[best], scores[best]
+        order = np.lexsort((ids, -scores))
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+_stores: Dict[str, JobVectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(db_path: Path) -> JobVectorStore:
+    """Return the process-wide vector store for db_path"""
+    with _stores_lock:
+        store = _stores.get(str(db_path))
+        if store is None:
+            store = _stores[str(db_path)] = JobVectorStore(db_path)
+        return store
@@ -0,0 +1,206 @@
+import json
+import sqlite3
+from typing import Callable, List, Tuple
+
+from db.job_index import requirement_tokens
+
+
+# The schema version is kept in PRAGMA user_version. schema.sql is version 1;
+# every later change is appended here and applied in order, in place, by
+# JobDatabase. Never edit a migration that has shipped - add a new one.
+
+
+def fill_job_requirements(conn: sqlite3.Connection):
+    """(Re)compute every job's canonical requirement tokens from the requirements column"""
+    conn.execute("DELETE FROM job_requirements")
+    rows = conn.execute("SELECT id, requirements FROM jobs").fetchall()
+    for job_id, requirements in rows:
+        try:
+            reqs = json.loads(requirements) if requirements else []
+        except Exception:
+            reqs = []
+        conn.executemany(
+            "INSERT OR IGNORE INTO job_requirements (job_id, token) VALUES (?, ?)",
+            [(job_id, token) for token in requirement_tokens(reqs)],
+        )
+
+
+def _backfill_fts(conn: sqlite3.Connection):
+    # Databases created before the full-text index existed
+    conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+
+
+def _job_requirements(conn: sqlite3.Connection):
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_jobs_experience_level ON jobs(experience_level, id);
+
+        CREATE TABLE IF NOT EXISTS job_requirements
+        (
+            job_id INTEGER NOT NULL,
+            token TEXT NOT NULL,
+            PRIMARY KEY (job_id, token)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_job_requirements_token ON job_requirements(token, job_id);
+
+        CREATE TRIGGER IF NOT EXISTS job_requirements_delete AFTER DELETE ON jobs BEGIN
+            DELETE FROM job_requirements WHERE job_id = old.id;
+        END;
+    """)
+    rows = conn.execute("SELECT id, requirements FROM jobs").fetchall()
+    for job_id, requirements in rows:
+        try:
+            reqs = json.loads(requirements) if requirements else []
+        except Exception:
+            reqs = []
+        conn.executemany(
+            "INSERT OR IGNORE INTO job_requirements (job_id, token) VALUES (?, ?)",
+            [(job_id, token) for token in requirement_tokens(reqs)],
+        )
+
+
+def _natural_key(conn: sqlite3.Connection):
+    # Bulk imports upsert on (title, company, location); keep the newest duplicate
+    conn.executescript("""
+        DELETE FROM jobs WHERE id NOT IN (
+            SELECT MAX(id) FROM jobs GROUP BY title, company, location
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_natural_key ON jobs(title, company, location);
+    """)
+
+
+def _candidates(conn: sqlite3.Connection):
+    # Analyzed candidate profiles, with their skill tokens indexed for reverse search
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS candidates
+        (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL UNIQUE,
+            name TEXT,
+            experience_level TEXT,
+            skills_analysis TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_candidates_experience_level ON candidates(experience_level, id);
+
+        CREATE TABLE IF NOT EXISTS candidate_tokens
+        (
+            candidate_id INTEGER NOT NULL,
+            token TEXT NOT NULL,
+            PRIMARY KEY (candidate_id, token)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_candidate_tokens_token ON candidate_tokens(token, candidate_id);
+
+        CREATE TRIGGER IF NOT EXISTS candidate_tokens_delete AFTER DELETE ON candidates BEGIN
+            DELETE FROM candidate_tokens WHERE candidate_id = old.id;
+        END;
+    """)
+
+
+def _job_change_feed(conn: sqlite3.Connection):
+    # Every insert, requirements/level change and delete of a job is appended to
+    # job_changes; consumers remember the last seq they processed (change_cursors).
+    # Each candidate's stored top-k records the seq it is current through.
+    conn.executescript("""
+        ALTER TABLE candidates ADD COLUMN matched_through INTEGER NOT NULL DEFAULT 0;
+
+        CREATE TABLE IF NOT EXISTS candidate_matches
+        (
+            candidate_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            match_pct INTEGER NOT NULL,
+            PRIMARY KEY (candidate_id, job_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_candidate_matches_job ON candidate_matches(job_id, candidate_id);
+
+        CREATE TRIGGER IF NOT EXISTS candidate_matches_delete AFTER DELETE ON candidates BEGIN
+            DELETE FROM candidate_matches WHERE candidate_id = old.id;
+        END;
+
+        CREATE TABLE IF NOT EXISTS job_changes
+        (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS change_cursors
+        (
+            name TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS job_changes_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO job_changes (job_id) VALUES (new.id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS job_changes_update AFTER UPDATE OF requirements, experience_level ON jobs BEGIN
+            INSERT INTO job_changes (job_id) VALUES (new.id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS job_changes_delete AFTER DELETE ON jobs BEGIN
+            INSERT INTO job_changes (job_id) VALUES (old.id);
+        END;
+
+        -- Plain UPDATEs (not only the upsert) keep updated_at current
+        CREATE TRIGGER IF NOT EXISTS jobs_touch_updated_at AFTER UPDATE ON jobs
+        WHEN new.updated_at IS old.updated_at BEGIN
+            UPDATE jobs SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+        END;
+
+        CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs(updated_at, id);
+    """)
+
+
+def _job_change_filter(conn: sqlite3.Connection):
+    # UPDATE OF fires even when the value is rewritten unchanged
+    conn.executescript("""
+        DROP TRIGGER IF EXISTS job_changes_update;
+
+        CREATE TRIGGER job_changes_update AFTER UPDATE OF requirements, experience_level ON jobs
+        WHEN old.requirements IS NOT new.requirements OR old.experience_level IS NOT new.experience_level BEGIN
+            INSERT INTO job_changes (job_id) VALUES (new.id);
+        END;
+    """)
+
+
+def _drop_matched_through(conn: sqlite3.Connection):
+    # Never read: a candidate saved after a change may have been scored by an index
+    # that had not seen it yet, so the re-matcher merges every change for everyone.
+    # DROP COLUMN needs SQLite 3.35; older versions keep the unused column.
+    try:
+        conn.execute("ALTER TABLE candidates DROP COLUMN matched_through")
+    except sqlite3.OperationalError as e:
+        print(f"JobDatabase: keeping candidates.matched_through ({e})")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (2, "backfill full-text index", _backfill_fts),
+    (3, "experience_level index and normalized job_requirements", _job_requirements),
+    (4, "unique natural key for upserts", _natural_key),
+    (5, "canonical skill ids in job_requirements", fill_job_requirements),
+    (6, "candidate profile store", _candidates),
+    (7, "job change feed and stored candidate matches", _job_change_feed),
+    (8, "job change feed skips unchanged requirements and level", _job_change_filter),
+    (9, "drop the unused candidates.matched_through", _drop_matched_through),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations in order and return the resulting schema version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, description, apply in MIGRATIONS:
+        if target <= version:
+            continue
+        print(f"JobDatabase: migrating schema to version {target} ({description})")
+        with conn:
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+        version = target
+    return version
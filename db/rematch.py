@@ -0,0 +1,196 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.candidates import CandidateStore, RETAINED_MATCHES, get_candidate_index, rank_matches, store_matches
+from db.connection import get_connection
+from db.job_index import get_job_index, requirement_tokens
+
+
+CURSOR_NAME = "candidate_rematch"
+REMATCH_INTERVAL = float(os.getenv("REMATCH_INTERVAL", "60"))
+CHANGES_PER_PASS = 10000
+
+
+def read_changes(conn, after_seq: int, limit: int = CHANGES_PER_PASS) -> Tuple[List[int], int]:
+    """(distinct changed job ids, last seq read) from the job change feed"""
+    rows = conn.execute(
+        "SELECT seq, job_id FROM job_changes WHERE seq > ? ORDER BY seq LIMIT ?", (after_seq, limit)
+    ).fetchall()
+    if not rows:
+        return [], after_seq
+    return sorted({row["job_id"] for row in rows}), rows[-1]["seq"]
+
+
+def _load_jobs(conn, job_ids: List[int]) -> Dict[int, Tuple[str, list]]:
+    # Current level and requirements of the changed jobs; deleted jobs are absent
+    jobs = {}
+    for i in range(0, len(job_ids), 500):
+        chunk = job_ids[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"SELECT id, experience_level, requirements FROM jobs WHERE id IN ({placeholders})", chunk
+        ):
+            try:
+                reqs = json.loads(row["requirements"]) if row["requirements"] else []
+            except Exception:
+                reqs = []
+            jobs[row["id"]] = (row["experience_level"], reqs)
+    return jobs
+
+
+def _stored_matches(conn, job_ids: List[int], candidate_ids: List[int]) -> Dict[int, Dict[int, int]]:
+    # Stored top-k of every candidate that scored a changed job or currently holds one
+    holders = set(candidate_ids)
+    for i in range(0, len(job_ids), 500):
+        chunk = job_ids[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        holders.update(
+            row[0] for row in conn.execute(
+                f"SELECT candidate_id FROM candidate_matches WHERE job_id IN ({placeholders})", chunk
+            )
+        )
+
+    stored = {candidate_id: {} for candidate_id in holders}
+    holders = list(holders)
+    for i in range(0, len(holders), 500):
+        chunk = holders[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"SELECT candidate_id, job_id, match_pct FROM candidate_matches WHERE candidate_id IN ({placeholders})",
+            chunk,
+        ):
+            stored[row["candidate_id"]][row["job_id"]] = row["match_pct"]
+    return stored
+
+
+def rematch_pass(db_path: Optional[Path] = None, k: int = RETAINED_MATCHES) -> Dict[str, Any]:
+    """Merge job changes since the last pass into every stored candidate's top-k.
+
+    Only the changed jobs are scored, against the candidate index, so a catalog
+    refresh costs O(changed jobs x matching candidates) and makes no LLM calls.
+    A candidate is fully rescored (in memory) only when a job in its full top-k
+    dropped or disappeared, since the replacement may be a job it never stored.
+    """
+    start = time.perf_counter()
+    store = CandidateStore(db_path)
+    conn = get_connection(store.db_path)
+
+    row = conn.execute("SELECT seq FROM change_cursors WHERE name = ?", (CURSOR_NAME,)).fetchone()
+    job_ids, last_seq = read_changes(conn, row["seq"] if row else 0)
+    stats = {"jobs": len(job_ids), "candidates": 0, "rescored": 0, "seconds": 0.0}
+    if not job_ids:
+        return stats
+
+    jobs = _load_jobs(conn, job_ids)
+
+    # Keep this process's indexes in step with the changes
+    job_index = get_job_index(store.db_path)
+    for job_id in job_ids:
+        if job_id in jobs:
+            job_index.add_job(job_id, *jobs[job_id])
+        else:
+            job_index.remove_job(job_id)
+    candidate_index = get_candidate_index(store.db_path)
+
+    new_scores: Dict[int, Dict[int, int]] = defaultdict(dict)
+    for job_id, (experience_level, reqs) in jobs.items():
+        for candidate_id, pct in candidate_index.score(requirement_tokens(reqs), experience_level):
+            new_scores[candidate_id][job_id] = pct
+
+    stored = _stored_matches(conn, job_ids, list(new_scores))
+    changed = set(job_ids)
+    updates = []
+    for candidate_id, current in stored.items():
+        scores = new_scores.get(candidate_id, {})
+        truncated = len(current) >= k
+        dropped = any(
+            job_id in changed and scores.get(job_id, -1) < pct for job_id, pct in current.items()
+        )
+        if truncated and dropped:
+            experience_level, tokens = candidate_index.profile(candidate_id)
+            merged = job_index.score(tokens, experience_level) if tokens else []
+            stats["rescored"] += 1
+        else:
+            merged = {job_id: pct for job_id, pct in current.items() if job_id not in changed}
+            merged.update(scores)
+            merged = merged.items()
+        updates.append((candidate_id, rank_matches(merged, k)))
+
+    with conn:
+        # Writes that bypassed JobDatabase (plain UPDATEs) left job_requirements behind
+        conn.executemany("DELETE FROM job_requirements WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+        conn.executemany(
+            "INSERT OR IGNORE INTO job_requirements (job_id, token) VALUES (?, ?)",
+            [(job_id, token) for job_id, (_, reqs) in jobs.items() for token in requirement_tokens(reqs)],
+        )
+        for candidate_id, top in updates:
+            store_matches(conn, candidate_id, top)
+        conn.execute(
+            "INSERT INTO change_cursors (name, seq) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET seq = excluded.seq",
+            (CURSOR_NAME, last_seq),
+        )
+        # This is the feed's only consumer; AUTOINCREMENT keeps seq monotonic after pruning
+        conn.execute("DELETE FROM job_changes WHERE seq <= ?", (last_seq,))
+
+    stats["candidates"] = len(updates)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def rematch(db_path: Optional[Path] = None, k: int = RETAINED_MATCHES) -> Dict[str, Any]:
+    """Run passes until the change feed is drained"""
+    totals = {"jobs": 0, "candidates": 0, "rescored": 0, "seconds": 0.0}
+    while True:
+        stats = rematch_pass(db_path, k)
+        if not stats["jobs"]:
+            return totals
+        for key in totals:
+            totals[key] += stats[key]
+        print(f"Re-matched {stats['jobs']} changed jobs into {stats['candidates']} candidates "
+              f"({stats['rescored']} rescored) in {stats['seconds']:.2f}s")
+
+
+def start_rematcher(db_path: Optional[Path] = None, interval: float = REMATCH_INTERVAL) -> threading.Thread:
+    """Keep stored candidate matches current from a daemon thread.
+
+    worker.py's supervisor starts one (--rematch-interval, REMATCH_INTERVAL); a
+    deployment without it runs `python db/rematch.py --interval N` instead.
+    """
+    def loop():
+        while True:
+            try:
+                rematch(db_path)
+            except Exception as e:
+                print(f"Re-matcher error: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="candidate-rematcher", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge job catalog changes into stored candidate matches")
+    parser.add_argument("--interval", type=float, help="Keep running, polling the change feed every N seconds")
+    parser.add_argument("--db", type=Path, help="Database file (default: db/jobs.db)")
+    args = parser.parse_args()
+
+    if args.interval is None:
+        totals = rematch(args.db)
+        print(f"Done: {totals['jobs']} changed jobs, {totals['candidates']} candidate updates "
+              f"in {totals['seconds']:.2f}s")
+    else:
+        while True:
+            rematch(args.db)
+            time.sleep(args.interval)
@@ -12,4 +12,31 @@ CREATE TABLE IF NOT EXISTS jobs
     benefits TEXT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-)
\ No newline at end of file
+);
+
+-- Full-text index over the searchable job fields, stored as an external-content
+-- table so the text is not duplicated. Triggers keep it in sync with jobs.
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title,
+    description,
+    requirements,
+    content='jobs',
+    content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, description, requirements)
+    VALUES (new.id, new.title, new.description, new.requirements);
+END;
+
+CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description, requirements)
+    VALUES ('delete', old.id, old.title, old.description, old.requirements);
+END;
+
+CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description, requirements)
+    VALUES ('delete', old.id, old.title, old.description, old.requirements);
+    INSERT INTO jobs_fts(rowid, title, description, requirements)
+    VALUES (new.id, new.title, new.description, new.requirements);
+END;
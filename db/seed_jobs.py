@@ -267,8 +267,8 @@ def seed_jobs():
         },
     ]
 
-    for job in jobs:
-        db.add_job(job)
+    # Upserts on title/company/location, so re-seeding does not duplicate jobs
+    db.add_jobs(jobs)
 
     print("Database seeded successfully!")
 
@@ -0,0 +1,167 @@
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from db.connection import get_connection
+
+
+TASKS_DB_PATH = Path(os.getenv("RECRUITER_TASKS_DB", Path(__file__).parent / "tasks.db"))
+# A running task whose worker has not checked in for this long is handed out again
+TASK_STALE_SECONDS = float(os.getenv("TASK_STALE_SECONDS", "900"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+
+# Progress shown when each pipeline stage starts (see OrchestratorAgent.process_application)
+STAGE_PROGRESS = {
+    "queued": 0,
+    "extraction": 10,
+    "analysis": 30,
+    "matching": 50,
+    "screening": 60,
+    "recommendation": 80,
+    "completed": 100,
+}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks
+    (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        payload TEXT NOT NULL,
+        stage TEXT NOT NULL DEFAULT 'queued',
+        progress INTEGER NOT NULL DEFAULT 0,
+        partial TEXT,
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        claim TEXT,
+        worker TEXT,
+        submitted_at REAL NOT NULL,
+        started_at REAL,
+        heartbeat_at REAL,
+        finished_at REAL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, id);
+"""
+
+# Writes by a worker only land while it still holds the task: a task handed out
+# again after a missed heartbeat belongs to its new claim
+_RUNNING = "id = ? AND status = 'running' AND (? IS NULL OR claim = ?)"
+
+
+class TaskQueue:
+    """Durable FIFO of pipeline jobs in SQLite, shared by the web process and workers.
+
+    A task moves queued -> running -> done | failed. Workers claim tasks with a
+    single conditional UPDATE, so any number of worker processes can drain the
+    queue without handing the same task out twice.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else TASKS_DB_PATH
+        with get_connection(self.db_path) as conn:
+            conn.executescript(SCHEMA)
+
+    def enqueue(self, payload: Dict[str, Any]) -> int:
+        """Add a task and return its ID"""
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO tasks (payload, submitted_at) VALUES (?, ?)", (json.dumps(payload), time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued task for worker, or return None when the queue is empty"""
+        now = time.time()
+        claim = uuid.uuid4().hex
+        with get_connection(self.db_path) as conn:
+            # Hand out tasks whose worker died, or give up on them after too many tries
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = CASE WHEN attempts >= ? THEN 'worker stopped responding' ELSE error END "
+                "WHERE status = 'running' AND heartbeat_at < ?",
+                (TASK_MAX_ATTEMPTS, TASK_MAX_ATTEMPTS, now - TASK_STALE_SECONDS),
+            )
+            conn.execute(
+                "UPDATE tasks SET status = 'running', claim = ?, worker = ?, attempts = attempts + 1, "
+                "started_at = ?, heartbeat_at = ? "
+                "WHERE id = (SELECT id FROM tasks WHERE status = 'queued' ORDER BY id LIMIT 1)",
+                (claim, worker, now, now),
+            )
+            row = conn.execute("SELECT id, payload FROM tasks WHERE claim = ?", (claim,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row["id"], "payload": json.loads(row["payload"]), "claim": claim}
+
+    def update(
+        self,
+        task_id: int,
+        stage: Optional[str] = None,
+        partial: Optional[Dict[str, str]] = None,
+        claim: Optional[str] = None,
+    ):
+        """Record progress (and act as the worker's heartbeat)"""
+        assignments = ["heartbeat_at = ?"]
+        params: list = [time.time()]
+        if stage is not None:
+            assignments += ["stage = ?", "progress = ?"]
+            params += [stage, STAGE_PROGRESS.get(stage, 0)]
+        if partial is not None:
+            assignments.append("partial = ?")
+            params.append(json.dumps(partial))
+        with get_connection(self.db_path) as conn:
+            conn.execute(
+                f"UPDATE tasks SET {', '.join(assignments)} WHERE {_RUNNING}", (*params, task_id, claim, claim)
+            )
+
+    def complete(self, task_id: int, result: Dict[str, Any], claim: Optional[str] = None) -> bool:
+        """Store the result; False if the task is no longer running (under claim, if given)"""
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', stage = 'completed', progress = 100, result = ?, "
+                f"finished_at = ? WHERE {_RUNNING}",
+                (json.dumps(result, default=str), time.time(), task_id, claim, claim),
+            )
+            return cursor.rowcount > 0
+
+    def fail(self, task_id: int, error: str, claim: Optional[str] = None) -> bool:
+        """Record the error; False if the task is no longer running (under claim, if given)"""
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET status = 'failed', error = ?, finished_at = ? WHERE {_RUNNING}",
+                (error, time.time(), task_id, claim, claim),
+            )
+            return cursor.rowcount > 0
+
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """Current state of a task, with its result once done"""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return None
+            position = None
+            if row["status"] == "queued":
+                position = conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE status = 'queued' AND id < ?", (task_id,)
+                ).fetchone()[0]
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "progress": row["progress"],
+            "queue_position": position,
+            "partial": json.loads(row["partial"]) if row["partial"] else {},
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "submitted_at": row["submitted_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tasks per status"""
+        with get_connection(self.db_path) as conn:
+            return {row[0]: row[1] for row in conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")}
@@ -0,0 +1,45 @@
+from db.connection import get_connection
+from db.database import JobDatabase
+
+
+def _job(title, requirements, description="Role"):
+    return {
+        "title": title,
+        "company": "Acme",
+        "location": "Remote",
+        "type": "Full-time",
+        "experience_level": "Mid-level",
+        "description": description,
+        "requirements": requirements,
+    }
+
+
+def _requirements(conn):
+    return sorted(tuple(row) for row in conn.execute("SELECT job_id, token FROM job_requirements"))
+
+
+def test_upsert_returns_ids_and_rewrites_only_changed_rows(tmp_path):
+    db = JobDatabase(tmp_path / "jobs.db")
+    jobs = [_job("Backend", ["Python"]), _job("Frontend", ["React"]), _job("Data", ["SQL"])]
+    db.add_jobs(jobs)
+    conn = get_connection(db.db_path)
+    ids = {row["title"]: row["id"] for row in conn.execute("SELECT id, title FROM jobs")}
+    changes = conn.execute("SELECT COUNT(*) FROM job_changes").fetchone()[0]
+
+    with conn:
+        # A no-op batch with one changed row and one new row
+        batch = [jobs[0], _job("Frontend", ["Vue"]), jobs[2], _job("Mobile", ["Swift"])]
+        job_ids = db._upsert_batch(conn, batch)
+
+    assert job_ids[:3] == [ids["Backend"], ids["Frontend"], ids["Data"]]
+    assert conn.execute("SELECT COUNT(*) FROM job_changes").fetchone()[0] == changes + 2
+    assert _requirements(conn) == sorted([
+        (ids["Backend"], "python"), (ids["Frontend"], "vue"), (ids["Data"], "sql"), (job_ids[3], "swift"),
+    ])
+
+
+def test_duplicate_keys_in_one_batch_keep_the_last_requirements(tmp_path):
+    db = JobDatabase(tmp_path / "jobs.db")
+    db.add_jobs([_job("Backend", ["Python"]), _job("Backend", ["Go"], description="Updated")])
+    conn = get_connection(db.db_path)
+    assert [tuple(row)[1:] for row in conn.execute("SELECT job_id, token FROM job_requirements")] == [("go",)]
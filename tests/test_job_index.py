@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from db.database import JobDatabase
+from db.job_index import get_job_index
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def _job(title, requirements, experience_level="Mid-level"):
+    return {
+        "title": title,
+        "company": "Acme",
+        "location": "Remote",
+        "type": "Full-time",
+        "experience_level": experience_level,
+        "description": f"{title} role",
+        "requirements": requirements,
+    }
+
+
+def _in_other_process(db_path, code):
+    script = f"import sys\nsys.path.insert(0, {str(REPO)!r})\ndb_path = {str(db_path)!r}\n" + textwrap.dedent(code)
+    subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+
+
+def _tokens(db_path):
+    _, _, items = get_job_index(db_path).snapshot()
+    return {job_id: (level, set(tokens)) for job_id, (level, tokens) in items.items()}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db = JobDatabase(tmp_path / "jobs.db")
+    db.add_job(_job("Backend Developer", ["Python", "SQL"]))
+    db.add_job(_job("Frontend Developer", ["React"]))
+    db.add_job(_job("Data Engineer", ["Spark"]))
+    return db.db_path
+
+
+def test_upsert_from_another_process_is_seen(db_path):
+    assert _tokens(db_path)[1] == ("Mid-level", {"python", "sql"})
+
+    _in_other_process(db_path, """
+        from db.database import JobDatabase
+        JobDatabase(db_path).add_job({"title": "Backend Developer", "company": "Acme", "location": "Remote",
+                                      "type": "Full-time", "experience_level": "Mid-level",
+                                      "description": "Backend Developer role", "requirements": ["COBOL"]})
+    """)
+    assert _tokens(db_path)[1] == ("Mid-level", {"cobol"})
+    assert get_job_index(db_path).score({"cobol"}, "Mid-level") == [(1, 100)]
+
+
+def test_plain_updates_and_deletes_from_another_process_are_seen(db_path):
+    _tokens(db_path)
+    _in_other_process(db_path, """
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute("UPDATE jobs SET experience_level = 'Senior' WHERE id = 2")
+            conn.execute("DELETE FROM jobs WHERE id = 3")
+    """)
+    tokens = _tokens(db_path)
+    assert tokens[2] == ("Senior", {"react"})
+    assert 3 not in tokens
+
+
+def test_rebuilds_when_the_feed_was_pruned(db_path):
+    _tokens(db_path)
+    # The re-matcher consumes and deletes the changes before this process looks
+    _in_other_process(db_path, """
+        import sqlite3
+        from db.rematch import rematch
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute("UPDATE jobs SET requirements = '[\\"Go\\"]' WHERE id = 1")
+        rematch(db_path)
+    """)
+    assert _tokens(db_path)[1] == ("Mid-level", {"go"})
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agents import matcher_agent
+from agents.matcher_agent import MatcherAgent
+from db.database import JobDatabase
+from db.job_index import get_job_index, tokenize
+from db.job_matrix import get_job_matrix
+
+SKILLS = [
+    "Python", "Python 3", "Java", "JavaScript", "JS", "React", "React.js", "Node.js", "SQL", "PostgreSQL",
+    "AWS", "Kubernetes", "k8s", "Docker", "Go", "Rust", "C++", "CI/CD", "Machine Learning", "ML",
+    "Excel", "Figma", "Communication", "TypeScript", "Spark",
+]
+LEVELS = ["Entry-level", "Mid-level", "Senior"]
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    """A seeded random catalog, with a block of identical jobs for ties"""
+    rng = random.Random(15)
+    db = JobDatabase(tmp_path_factory.mktemp("matrix") / "jobs.db")
+    jobs = [
+        {
+            "title": f"Job {i}",
+            "company": f"Company {i % 37}",
+            "location": "Remote",
+            "type": "Full-time",
+            "experience_level": rng.choice(LEVELS),
+            "description": "Role",
+            "requirements": rng.sample(SKILLS, rng.randint(0, 6)),
+        }
+        for i in range(400)
+    ]
+    jobs += [
+        {**jobs[0], "title": f"Twin {i}", "experience_level": "Senior", "requirements": ["Rust", "Go", "Excel"]}
+        for i in range(5)
+    ]
+    db.add_jobs(jobs)
+    queries = [(rng.sample(SKILLS, rng.randint(1, 6)), rng.choice(LEVELS)) for _ in range(150)]
+    return db, queries
+
+
+def _tokens(skills):
+    tokens = set()
+    for skill in skills:
+        tokens.update(tokenize(skill))
+    return tokens
+
+
+def _expected(index, skills, level):
+    return sorted(index.score(_tokens(skills), level), key=lambda s: (-s[1], s[0]))
+
+
+def test_top_k_and_best_match_the_index(catalog):
+    db, queries = catalog
+    index = get_job_index(db.db_path)
+    matrix = get_job_matrix(index)
+    ties = 0
+    for skills, level in queries:
+        expected = _expected(index, skills, level)
+        matched = index.matched_tokens(_tokens(skills))
+        assert matrix.top_k([matched], level)[0] == expected
+        for k in (1, 3, 10):
+            assert matrix.top_k([matched], level, k)[0] == expected[:k]
+            ties += len(expected) > k and expected[k - 1][1] == expected[k][1]
+            above = [s for s in expected if s[1] >= 30]
+            assert matrix.best(matched, level, k, min_pct=30) == (above[:k], len(above))
+    assert ties, "the corpus should exercise ties at the k-th score"
+
+
+def test_ties_at_k_break_by_job_id(catalog):
+    db, _ = catalog
+    index = get_job_index(db.db_path)
+    skills = ["Rust", "Go", "Excel"]
+    expected = _expected(index, skills, "Senior")
+    top, count = get_job_matrix(index).best(index.matched_tokens(_tokens(skills)), "Senior", 2)
+    assert expected[1][1] == expected[2][1] == 100  # the twins tie across the cut
+    assert top == expected[:2]
+    assert count == len(expected)
+
+
+def test_query_with_no_hits(catalog):
+    db, _ = catalog
+    index = get_job_index(db.db_path)
+    matched = index.matched_tokens(_tokens(["Cobol"]))
+    assert get_job_matrix(index).top_k([matched], "Senior", 3) == [[]]
+    assert get_job_matrix(index).best(matched, "Senior", 3) == ([], 0)
+
+
+def test_vector_mode_matches_scan_mode(catalog, monkeypatch):
+    db, queries = catalog
+    monkeypatch.setattr(matcher_agent, "JobDatabase", lambda: db)
+    monkeypatch.setattr(matcher_agent, "MATCHER_SEARCH_MODE", "vector")
+    matcher = MatcherAgent()
+    for skills, level in queries:
+        scanned = sorted(matcher._score_jobs_scan(_tokens(skills), level), key=lambda s: (-s[1], s[0]))
+        above = [s for s in scanned if s[1] >= 30]
+        jobs, count = matcher.top_matches(skills, level, 5, 30)
+        assert [(job["id"], job["match_pct"]) for job in jobs] == above[:5]
+        assert count == len(above)
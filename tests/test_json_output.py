@@ -0,0 +1,38 @@
+import asyncio
+
+from agents.base_agent import BaseAgent, json_output_stats
+from utils.telemetry import prometheus_text
+
+
+class SkillsAgent(BaseAgent):
+    output_schema = {
+        "type": "object",
+        "required": ["skills"],
+        "properties": {"skills": {"type": "array", "items": {"type": "string"}}},
+    }
+
+
+def test_repaired_reply_is_counted(monkeypatch):
+    agent = SkillsAgent("RepairTestAgent", "Extract skills", use_cache=False)
+    replies = iter(['{"skills": "Python"}', '{"skills": ["Python"]}'])
+    prompts = []
+
+    async def fake_query(prompt, **kwargs):
+        prompts.append(prompt)
+        return next(replies)
+
+    monkeypatch.setattr(agent, "_query_ollama", fake_query)
+    assert asyncio.run(agent._query_json("resume text")) == {"skills": ["Python"]}
+    assert len(prompts) == 2 and '{"skills": "Python"}' in prompts[1]
+
+    stats = json_output_stats()["RepairTestAgent"]
+    assert stats["calls"] == 1
+    assert stats["parse_failures"] == 1
+    assert stats["repair_attempts"] == 1
+    assert stats["repaired"] == 1
+    assert stats.get("unrepaired", 0) == 0
+    assert stats["parse_failure_rate"] == 1.0
+
+    metrics = prometheus_text()
+    assert 'recruiter_llm_json_outputs_total{agent="RepairTestAgent",event="parse_failures"} 1' in metrics
+    assert 'recruiter_llm_json_outputs_total{agent="RepairTestAgent",event="repaired"} 1' in metrics
@@ -0,0 +1,238 @@
+import asyncio
+import base64
+import json
+import struct
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agents import matcher_agent
+from agents.matcher_agent import MatcherAgent
+from db import job_vectors
+from db.connection import get_connection
+from db.database import JobDatabase
+from db.job_vectors import JobVectorStore, get_vector_store
+from utils import llm_client
+
+
+# Each embedding counts these words in the text, so similarity follows shared skills
+VOCABULARY = ["python", "django", "react", "javascript", "java", "spring", "docker", "aws"]
+
+JOBS = [
+    ("Backend Developer", ["Python", "Django", "Docker"]),
+    ("Frontend Developer", ["React", "JavaScript"]),
+    ("Java Engineer", ["Java", "Spring", "AWS"]),
+]
+
+
+def embed(text):
+    words = text.lower().replace(",", " ").replace(".", " ").split()
+    return [float(words.count(word)) for word in VOCABULARY]
+
+
+class EmbeddingServer:
+    """OpenAI-compatible /v1/embeddings endpoint on a local port, recording every input"""
+
+    def __init__(self):
+        self.inputs = []
+        self.fail = False
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path != "/v1/embeddings" or owner.fail:
+                    self._reply(400, {"error": {"message": "embedding failed", "type": "invalid_request_error"}})
+                    return
+                texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                owner.inputs.append(texts)
+                data = []
+                for i, text in enumerate(texts):
+                    vector = embed(text)
+                    if body.get("encoding_format") == "base64":
+                        vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode()
+                    data.append({"object": "embedding", "index": i, "embedding": vector})
+                self._reply(200, {"object": "list", "data": data, "model": body["model"],
+                                  "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+            def _reply(self, status, payload):
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def texts(self):
+        return [text for batch in self.inputs for text in batch]
+
+
+def post_embeddings(base_url):
+    """embed_texts over plain urllib, for when the openai SDK is not installed"""
+
+    async def embed_texts(texts, model=llm_client.OLLAMA_EMBED_MODEL):
+        def post():
+            request = urllib.request.Request(
+                f"{base_url}/embeddings",
+                data=json.dumps({"model": model, "input": texts}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+
+        data = (await asyncio.to_thread(post))["data"]
+        return [item["embedding"] for item in sorted(data, key=lambda item: item["index"])]
+
+    return embed_texts
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = EmbeddingServer()
+    monkeypatch.setattr(llm_client, "OLLAMA_BASE_URL", fake.url)
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        monkeypatch.setattr(llm_client, "embed_texts", post_embeddings(fake.url))
+    yield fake
+    fake.server.shutdown()
+
+
+@pytest.fixture
+def db(tmp_path):
+    jobs = JobDatabase(tmp_path / "jobs.db")
+    for title, requirements in JOBS:
+        jobs.add_job(_job(title, requirements))
+    return jobs
+
+
+@pytest.fixture
+def matcher(db, monkeypatch):
+    monkeypatch.setattr(matcher_agent, "JobDatabase", lambda: db)
+    return MatcherAgent()
+
+
+def _job(title, requirements):
+    return {
+        "title": title,
+        "company": "Acme",
+        "location": "Remote",
+        "type": "Full-time",
+        "experience_level": "Mid-level",
+        "salary_range": "$100k",
+        "description": f"{title} role",
+        "requirements": requirements,
+        "benefits": [],
+    }
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await llm_client.close_async_client()
+
+    return asyncio.run(main())
+
+
+def test_sync_embeds_only_new_jobs(server, db):
+    store = get_vector_store(db.db_path)
+    assert run(store.sync()) == 3
+    assert len(store) == 3 and len(server.texts()) == 3
+
+    assert run(store.sync()) == 0
+    assert len(server.texts()) == 3
+
+    db.add_job(_job("Data Engineer", ["Python", "AWS"]))
+    assert run(store.sync()) == 1
+    assert len(store) == 4
+    assert server.texts()[-1].startswith("Data Engineer")
+
+
+def test_sync_reembeds_edited_jobs_and_drops_deleted(server, db):
+    store = get_vector_store(db.db_path)
+    run(store.sync())
+    frontend = store.similarities(embed("react javascript"))
+
+    # The upsert rewrites the Frontend row in place, keeping its id
+    db.add_job(_job("Frontend Developer", ["Python", "Django"]))
+    assert run(store.sync()) == 1
+    assert server.texts()[-1].startswith("Frontend Developer")
+    scores = store.similarities(embed("python django"))
+    [frontend_id] = [job_id for job_id, score in frontend.items() if score == max(frontend.values())]
+    assert scores[frontend_id] > 0.9
+    assert run(store.sync()) == 0
+
+    with get_connection(db.db_path) as conn:
+        conn.execute("DELETE FROM jobs WHERE id = ?", (frontend_id,))
+    assert run(store.sync()) == 0
+    assert len(store) == 2
+    assert frontend_id not in store.similarities(embed("python django"))
+    assert frontend_id not in dict(store.top_k(embed("python django"), 5))
+
+    # A fresh process reads the same live rows back from disk
+    reopened = JobVectorStore(db.db_path)
+    assert len(reopened) == 2
+    assert reopened.similarities(embed("python")) == store.similarities(embed("python"))
+    assert run(reopened.sync()) == 0
+
+
+def test_compaction_keeps_live_vectors(server, db, monkeypatch):
+    monkeypatch.setattr(job_vectors, "VECTOR_COMPACT_MIN_ROWS", 1)
+    store = JobVectorStore(db.db_path)
+    run(store.sync())
+    before = store.similarities(embed("java aws"))
+    first_vectors = store.vectors_path
+
+    # Re-storing the same vectors twice leaves twice as many superseded rows as live ones
+    for _ in range(2):
+        vectors = np.array(store._vectors[[store._row_of[job_id] for job_id in before]])
+        store.append(llm_client.OLLAMA_EMBED_MODEL, list(before), vectors)
+
+    assert store.vectors_path != first_vectors and not first_vectors.exists()
+    assert len(store) == 3 and len(store._ids) <= 2 * len(store)
+    assert store.similarities(embed("java aws")) == pytest.approx(before)
+    assert JobVectorStore(db.db_path).similarities(embed("java aws")) == pytest.approx(before)
+
+
+def test_semantic_ranks_by_similarity(server, matcher, monkeypatch):
+    monkeypatch.setattr(matcher_agent, "MATCHER_SEARCH_MODE", "semantic")
+    jobs = run(matcher.search_jobs_semantic(["Python", "Django"], "Mid-level"))
+
+    assert [job["title"] for job in jobs][0] == "Backend Developer"
+    assert jobs[0]["semantic_score"] > jobs[1]["semantic_score"]
+    assert jobs[0]["match_pct"] == round(jobs[0]["semantic_score"] * 100)
+
+
+def test_hybrid_blends_similarity_with_token_match(server, matcher, monkeypatch):
+    monkeypatch.setattr(matcher_agent, "MATCHER_SEARCH_MODE", "hybrid")
+    monkeypatch.setattr(matcher_agent, "HYBRID_SEMANTIC_WEIGHT", 0.5)
+    jobs = run(matcher.search_jobs_semantic(["Java", "Spring"], "Mid-level"))
+
+    best = jobs[0]
+    assert best["title"] == "Java Engineer"
+    assert best["token_match_pct"] > 0
+    expected = 0.5 * best["semantic_score"] * 100 + 0.5 * best["token_match_pct"]
+    assert abs(best["match_pct"] - expected) <= 1
+
+
+def test_falls_back_to_token_matching_when_embedding_fails(server, matcher, monkeypatch):
+    monkeypatch.setattr(matcher_agent, "MATCHER_SEARCH_MODE", "semantic")
+    server.fail = True
+    jobs = run(matcher.search_jobs_semantic(["React", "JavaScript"], "Mid-level"))
+
+    assert jobs == matcher.search_jobs(["React", "JavaScript"], "Mid-level")
+    assert jobs[0]["title"] == "Frontend Developer"
+    assert "semantic_score" not in jobs[0]
@@ -0,0 +1,33 @@
+from utils.telemetry import Histogram, prometheus_text
+
+
+def _series(name):
+    return [line for line in prometheus_text().splitlines() if line.startswith(name)]
+
+
+def test_histogram_overflow_counts_only_in_inf_bucket():
+    histogram = Histogram("test_overflow_seconds", "Overflow test", ("stage",), buckets=(1, 2))
+    histogram.observe(0.5, stage="analysis")
+    histogram.observe(10, stage="analysis")
+
+    assert _series("test_overflow_seconds") == [
+        'test_overflow_seconds_bucket{stage="analysis",le="1"} 1',
+        'test_overflow_seconds_bucket{stage="analysis",le="2"} 1',
+        'test_overflow_seconds_bucket{stage="analysis",le="+Inf"} 2',
+        'test_overflow_seconds_sum{stage="analysis"} 10.5',
+        'test_overflow_seconds_count{stage="analysis"} 2',
+    ]
+
+
+def test_histogram_bound_is_inclusive():
+    histogram = Histogram("test_bound_seconds", "Bound test", (), buckets=(1, 2))
+    histogram.observe(1)
+    histogram.observe(2)
+
+    assert _series("test_bound_seconds") == [
+        'test_bound_seconds_bucket{le="1"} 1',
+        'test_bound_seconds_bucket{le="2"} 2',
+        'test_bound_seconds_bucket{le="+Inf"} 2',
+        "test_bound_seconds_sum 3",
+        "test_bound_seconds_count 2",
+    ]
@@ -0,0 +1,66 @@
+from typing import Optional
+
+
+class JsonObjectScanner:
+    """Incrementally scan streamed text for the first complete top-level JSON object.
+
+    Feed chunks as they arrive; once the outermost object closes, `complete`
+    becomes True and `object_text` holds the text from the opening `{` to the
+    matching `}`. Braces inside strings (and escaped quotes) are ignored.
+    """
+
+    __slots__ = ("_parts", "_length", "_start", "_end", "_depth", "_in_string", "_escaped")
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def object_text(self) -> Optional[str]:
+        if self._end is None:
+            return None
+        return self.text[self._start:self._end + 1]
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk and return True once the top-level object has closed"""
+        if self.complete or not chunk:
+            return self.complete
+
+        offset = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._start is not None:
+                    self._in_string = True
+            elif ch == "{":
+                if self._start is None:
+                    self._start = offset + i
+                self._depth += 1
+            elif ch == "}" and self._start is not None:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = offset + i
+                    return True
+        return False
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+CACHE_DIR = Path(os.getenv("RECRUITER_CACHE_DIR", Path(__file__).parent.parent / ".cache"))
+CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+class SQLiteCache:
+    """Content-addressed key/value cache stored in SQLite.
+
+    Entries are evicted least-recently-used first once the table grows past
+    max_entries or max_bytes, and expire after ttl_seconds. The file can be
+    shared by Streamlit reruns and several worker processes.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        table: str = "completions",
+        max_entries: int = 5000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.db_path = Path(db_path)
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed ON {self.table}(accessed_at)"
+            )
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Hash the given parts into a stable cache key"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: str):
+        """Store value under key and evict old entries if over budget"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                f"""INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)""",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        count, total = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk from least to most recently used until we are back under budget
+        to_delete = []
+        for key, size in conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", to_delete)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process plus the table size"""
+        with self._connect() as conn:
+            count, total = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+
+_completion_cache: Optional[SQLiteCache] = None
+
+
+def get_completion_cache() -> SQLiteCache:
+    """Return the process-wide cache for LLM completions"""
+    global _completion_cache
+    if _completion_cache is None:
+        _completion_cache = SQLiteCache(
+            CACHE_DIR / "llm_cache.db",
+            table="completions",
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        )
+    return _completion_cache
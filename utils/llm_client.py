@@ -0,0 +1,67 @@
+import asyncio
+import os
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
+OLLAMA_API_KEY = os.getenv("OLLAMA_API_KEY", "ollama")  # Ollama ignores the key
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "16"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+
+# httpx pools are bound to the event loop that opened their connections, and
+# Streamlit starts a fresh loop for every asyncio.run(). Keep one client per loop
+# so all agents running on that loop share a single keep-alive pool.
+_clients: Dict[asyncio.AbstractEventLoop, "AsyncOpenAI"] = {}
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """Return the process-wide AsyncOpenAI client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    # Drop clients whose loop has already finished (previous Streamlit runs)
+    for stale in [l for l in _clients if l.is_closed()]:
+        del _clients[stale]
+
+    client = _clients.get(loop)
+    if client is None:
+        # The SDK is imported on the first LLM call, not when the agents are imported
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=10.0),
+        )
+        client = AsyncOpenAI(
+            base_url=OLLAMA_BASE_URL,
+            api_key=OLLAMA_API_KEY,
+            http_client=http_client,
+            max_retries=2,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """Close the client bound to the running event loop, if any"""
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+    if client is not None:
+        await client.close()
+
+
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+
+
+async def embed_texts(texts: List[str], model: str = OLLAMA_EMBED_MODEL) -> List[List[float]]:
+    """Embed texts through the OpenAI-compatible /embeddings endpoint, in input order"""
+    if not texts:
+        return []
+    response = await get_async_client().embeddings.create(model=model, input=texts)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
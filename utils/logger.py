@@ -1,9 +1,27 @@
 import logging
+import threading
 from datetime import datetime
 import os
 
+_lock = threading.Lock()
+_configured = False
+
+
 def setup_logger():
-    """Setup applicaiton logging"""
+    """Setup applicaiton logging.
+
+    Safe to call on every Streamlit rerun: the log file and handlers are only
+    created by the first call in a process.
+    """
+    global _configured
+    with _lock:
+        if not _configured:
+            _configure()
+            _configured = True
+    return logging.getLogger("AI_Recruiter")
+
+
+def _configure():
     logs_dir = "logs"
     if not os.path.exists(logs_dir):
         os.makedirs(logs_dir)
@@ -19,4 +37,3 @@ def setup_logger():
                 logging.StreamHandler() 
             ]
         )
-    return logging.getLogger("AI_Recruiter")
\ No newline at end of file
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import os
+from contextlib import aclosing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+from utils.llm_cache import CACHE_DIR, SQLiteCache
+
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "60"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_text_cache: Optional[SQLiteCache] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _executor
+
+
+def _get_text_cache() -> SQLiteCache:
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = SQLiteCache(CACHE_DIR / "llm_cache.db", table="pdf_text", max_entries=2000)
+    return _text_cache
+
+
+def _count_pages(file_path: str) -> int:
+    """Count the pages of a PDF (runs in a worker process)"""
+    from pdfminer.pdfpage import PDFPage  # pip install pdfminer.six
+
+    with open(file_path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def _extract_page(file_path: str, page_number: int) -> str:
+    """Extract the text of one zero-based page (runs in a worker process)"""
+    from pdfminer.high_level import extract_text  # pip install pdfminer.six
+
+    return extract_text(file_path, page_numbers=[page_number])
+
+
+def file_content_hash(file_path: str) -> str:
+    """Return the sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_content_hash(text: str) -> str:
+    """Return the sha256 of text with runs of whitespace collapsed"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+async def iter_pdf_pages(
+    file_path: str, max_pages: Optional[int] = None
+) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (page_number, text) pairs as soon as each page is extracted.
+
+    Pages are parsed in parallel in a process pool, so results arrive in
+    completion order rather than page order.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+
+    page_count = await loop.run_in_executor(executor, _count_pages, file_path)
+    if max_pages and page_count > max_pages:
+        print(f"PDF extractor: {file_path} has {page_count} pages, keeping the first {max_pages}")
+        page_count = max_pages
+
+    async def extract(page_number: int) -> Tuple[int, str]:
+        text = await loop.run_in_executor(executor, _extract_page, file_path, page_number)
+        return page_number, text
+
+    tasks = [asyncio.create_task(extract(i)) for i in range(page_count)]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            yield await next_page
+    finally:
+        # Pages not yet picked up by a worker are dropped on timeout/cancel
+        for task in tasks:
+            task.cancel()
+
+
+async def extract_pdf_text(
+    file_path: str,
+    max_pages: Optional[int] = None,
+    timeout: Optional[float] = None,
+    on_page: Optional[Callable[[int, str], None]] = None,
+) -> str:
+    """Extract the text of a PDF off the event loop, cached by file content hash.
+
+    If the per-file timeout expires, the pages finished so far are returned
+    (and not cached) instead of stalling the rest of the pipeline.
+    """
+    timeout = PDF_TIMEOUT if timeout is None else timeout
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    cache = _get_text_cache()
+    content_hash = await asyncio.to_thread(file_content_hash, file_path)
+    cache_key = cache.make_key(sha256=content_hash, max_pages=max_pages)
+    cached = await asyncio.to_thread(cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    pages = {}
+    complete = True
+    try:
+        async with asyncio.timeout(timeout):
+            async with aclosing(iter_pdf_pages(file_path, max_pages)) as page_stream:
+                async for page_number, text in page_stream:
+                    pages[page_number] = text
+                    if on_page is not None:
+                        on_page(page_number, text)
+    except TimeoutError:
+        complete = False
+        print(f"PDF extractor: timed out after {timeout}s on {file_path}, "
+              f"returning {len(pages)} extracted pages")
+
+    raw_text = "".join(pages[i] for i in sorted(pages))
+    if complete:
+        await asyncio.to_thread(cache.set, cache_key, raw_text)
+    return raw_text
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Canonical skill id -> aliases. Canonical ids are plain lowercase words so they
+# survive tokenization unchanged (e.g. "cpp" rather than "c++").
+TAXONOMY_PATH = Path(os.getenv("SKILL_TAXONOMY_PATH", Path(__file__).parent / "skill_taxonomy.json"))
+CANONICALIZE_CACHE_SIZE = 65536
+
+
+def _is_word_char(ch: str) -> bool:
+    # "+" and "#" belong to words so "c" never matches inside "c++" or "c#"
+    return ch.isalnum() or ch in "+#"
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every pattern occurrence in one pass over the text.
+
+    Patterns map to values (here canonical skill ids). Matches only count on word
+    boundaries, and overlapping matches resolve leftmost-longest, so "react native"
+    wins over "react" and "js" never matches inside "json".
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (pattern length, value) for every pattern ending there
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, value in patterns.items():
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append((len(pattern), value))
+
+        # Breadth-first failure links, merging each state's outputs with its fallback's
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return non-overlapping (start, end, value) matches in text order"""
+        goto, fail, out = self._goto, self._fail, self._out
+        candidates = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, value in out[state]:
+                start, end = i - length + 1, i + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]):
+                    continue
+                candidates.append((start, end, value))
+
+        # Leftmost-longest, skipping anything that overlaps an accepted match
+        candidates.sort(key=lambda m: (m[0], -m[1]))
+        matches = []
+        last_end = 0
+        for start, end, value in candidates:
+            if start >= last_end:
+                matches.append((start, end, value))
+                last_end = end
+        return matches
+
+
+def load_taxonomy(path: Path = TAXONOMY_PATH) -> Dict[str, str]:
+    """Read the taxonomy file into an alias -> canonical id map"""
+    with open(path, "r", encoding="utf-8") as f:
+        taxonomy = json.load(f)
+    aliases = {}
+    for canonical, names in taxonomy.items():
+        for name in [canonical, *names]:
+            aliases[" ".join(name.lower().split())] = canonical
+    return aliases
+
+
+_matcher: Optional[AhoCorasick] = None
+_aliases_by_skill: Dict[str, List[str]] = {}
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> AhoCorasick:
+    """The automaton for TAXONOMY_PATH, compiled once per process"""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                aliases = load_taxonomy()
+                for alias, canonical in aliases.items():
+                    _aliases_by_skill.setdefault(canonical, []).append(alias)
+                _matcher = AhoCorasick(aliases)
+    return _matcher
+
+
+def skill_aliases(canonical: str) -> List[str]:
+    """Every spelling of a canonical skill id, for searching raw (uncanonicalized) text"""
+    get_matcher()
+    return _aliases_by_skill.get(canonical, [canonical])
+
+
+@lru_cache(maxsize=CANONICALIZE_CACHE_SIZE)
+def canonicalize(text: str) -> str:
+    """Lowercase text with every known skill alias replaced by its canonical id"""
+    text = text.lower()
+    matches = get_matcher().find(text)
+    if not matches:
+        return text
+    parts = []
+    position = 0
+    for start, end, canonical in matches:
+        parts.append(text[position:start])
+        parts.append(canonical)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def canonical_skills(texts: Iterable[str]) -> Set[str]:
+    """Canonical skill ids mentioned anywhere in texts"""
+    matcher = get_matcher()
+    skills = set()
+    for text in texts:
+        if text:
+            skills.update(value for _, _, value in matcher.find(text.lower()))
+    return skills
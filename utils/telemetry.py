@@ -0,0 +1,268 @@
+import bisect
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Seconds; stretched past the Prometheus defaults since LLM stages take minutes on CPU
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Characters (or tokens) in a prompt
+SIZE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+@dataclass(slots=True)
+class Span:
+    """One timed operation (a pipeline stage or an LLM call) within a trace"""
+    name: str
+    trace_id: Optional[str]
+    span_id: str
+    parent_id: Optional[str]
+    start: float  # epoch seconds
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _started: float = field(default=0.0, repr=False)
+    _token: Any = field(default=None, repr=False)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Stop the clock and make the parent span current again"""
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.attributes["error"] = type(error).__name__
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """The spans of one application, tied together by trace_id"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans: List[Span] = []  # appended from worker threads too; list.append is atomic
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, "spans": [span.to_dict() for span in self.spans]}
+
+
+# Context variables keep concurrent applications on one event loop apart, and
+# asyncio.to_thread copies them into the worker thread
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    active = _current_trace.get()
+    return active.trace_id if active is not None else None
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None) -> Iterator[Trace]:
+    """Collect the spans started inside the block under one trace ID"""
+    active = Trace(trace_id)
+    token = _current_trace.set(active)
+    try:
+        yield active
+    finally:
+        _current_trace.reset(token)
+
+
+def start_span(name: str, **attributes: Any) -> Span:
+    """Start a span under the current one; call finish() on it when done"""
+    active = _current_trace.get()
+    parent = _current_span.get()
+    span = Span(
+        name=name,
+        trace_id=active.trace_id if active is not None else None,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent is not None else None,
+        start=time.time(),
+        attributes=attributes,
+        _started=time.perf_counter(),
+    )
+    span._token = _current_span.set(span)
+    if active is not None:
+        active.spans.append(span)
+    return span
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the block as a span"""
+    current = start_span(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    else:
+        current.finish()
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # labels -> bucket counts + [+Inf, sum, count]
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            # Values above the last bound land in the +Inf slot, len(buckets)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = dict(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(labels, le='+Inf')} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(labels)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """Monotonic total per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """Current total per label tuple (in labelnames order)"""
+        with self._lock:
+            return dict(self._series)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_labels(dict(zip(self.labelnames, key)))} {_number(value)}"
+                for key, value in sorted(self._series.items())
+            ]
+
+
+_metrics: List[Any] = []
+_metrics_lock = threading.Lock()
+
+
+def _register(metric):
+    with _metrics_lock:
+        _metrics.append(metric)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str], **extra: str) -> str:
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not float(value).is_integer() else str(int(value))
+
+
+def prometheus_text() -> str:
+    """All metrics of this process in the Prometheus text exposition format"""
+    lines = []
+    with _metrics_lock:
+        metrics = list(_metrics)
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve prometheus_text() on http://host:port/metrics from a daemon thread"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # scrapes are too frequent to print
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# Pipeline metrics. Each process keeps its own; scrape every worker/server process.
+STAGE_SECONDS = Histogram(
+    "recruiter_stage_duration_seconds", "Wall-clock time of each pipeline stage", ("stage",)
+)
+APPLICATIONS = Counter("recruiter_applications_total", "Applications processed", ("status",))
+LLM_SECONDS = Histogram(
+    "recruiter_llm_request_duration_seconds", "Duration of LLM requests that missed the cache", ("agent",)
+)
+LLM_FIRST_BYTE_SECONDS = Histogram(
+    "recruiter_llm_time_to_first_byte_seconds", "Time until the first streamed token arrived", ("agent",)
+)
+LLM_PROMPT_CHARS = Histogram(
+    "recruiter_llm_prompt_chars", "Characters sent per LLM request (instructions + prompt)", ("agent",), SIZE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "recruiter_llm_tokens_total", "Tokens reported by the LLM server (or estimated)", ("agent", "kind")
+)
+LLM_CACHE = Counter("recruiter_llm_cache_requests_total", "Completion cache lookups", ("agent", "result"))
+LLM_JSON_OUTPUTS = Counter(
+    "recruiter_llm_json_outputs_total",
+    "Structured-output events: calls, parse_failures, repair_attempts, repaired, unrepaired",
+    ("agent", "event"),
+)
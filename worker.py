@@ -0,0 +1,150 @@
+#Background workers that drain the resume task queue
+from pathlib import Path
+from typing import Dict
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+
+from db.rematch import REMATCH_INTERVAL, start_rematcher
+from db.task_queue import TaskQueue
+from utils.telemetry import start_metrics_server
+
+
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+PARTIAL_FLUSH_INTERVAL = 0.5  # seconds between progress writes per task
+HEARTBEAT_INTERVAL = 30.0
+
+
+async def run_task(orchestrator, queue: TaskQueue, task: Dict):
+    """Process one claimed task, reporting stages and streamed text to the queue"""
+    task_id, claim = task["id"], task.get("claim")
+    partial: Dict[str, str] = {}
+    pending: Dict[str, str] = {}  # progress not yet written
+    changed = asyncio.Event()
+
+    # The callbacks run on the event loop, so they only buffer; report() writes
+    def on_stage(stage: str):
+        pending["stage"] = stage
+        changed.set()
+
+    def on_partial(stage: str, text: str):
+        partial[stage] = text
+        pending["partial"] = stage
+        changed.set()
+
+    async def report():
+        # At most one write per PARTIAL_FLUSH_INTERVAL, and a heartbeat when idle
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+            stage = pending.pop("stage", None)
+            snapshot = dict(partial) if pending.pop("partial", None) else None
+            try:
+                await asyncio.to_thread(queue.update, task_id, stage, snapshot, claim)
+            except sqlite3.Error as e:
+                print(f"Worker: could not record progress of task {task_id}: {e}")
+            await asyncio.sleep(PARTIAL_FLUSH_INTERVAL)
+
+    reporter = asyncio.create_task(report())
+    try:
+        result = await orchestrator.process_application(
+            task["payload"], on_partial=on_partial, on_stage=on_stage
+        )
+        reporter.cancel()
+        if await asyncio.to_thread(queue.complete, task_id, result, claim):
+            print(f"Worker: task {task_id} done")
+        else:
+            print(f"Worker: task {task_id} was handed to another worker; result dropped")
+    except Exception as e:
+        print(f"Worker: task {task_id} failed: {e}")
+        try:
+            await asyncio.to_thread(queue.fail, task_id, str(e), claim)
+        except sqlite3.Error as db_error:
+            # Left running; it is handed out again once its heartbeat goes stale
+            print(f"Worker: could not record the failure of task {task_id}: {db_error}")
+    finally:
+        reporter.cancel()
+
+
+async def work(worker_name: str, concurrency: int, db_path: Path = None, orchestrator=None):
+    """Claim and run tasks forever, up to concurrency at a time, with one warm orchestrator"""
+    if orchestrator is None:
+        from agents.orchestrator import OrchestratorAgent
+        orchestrator = OrchestratorAgent()
+
+    queue = TaskQueue(db_path)
+
+    async def slot(n: int):
+        name = f"{worker_name}/{n}"
+        while True:
+            try:
+                task = await asyncio.to_thread(queue.claim, name)
+            except sqlite3.Error as e:
+                # e.g. "database is locked" past the busy timeout; keep the slot alive
+                print(f"Worker {name}: could not claim a task: {e}")
+                await asyncio.sleep(WORKER_POLL_INTERVAL)
+                continue
+            if task is None:
+                await asyncio.sleep(WORKER_POLL_INTERVAL)
+                continue
+            print(f"Worker {name}: claimed task {task['id']}")
+            await run_task(orchestrator, queue, task)
+
+    await asyncio.gather(*(slot(n) for n in range(max(1, concurrency))))
+
+
+def _worker_main(index: int, concurrency: int, db_path: Path = None, metrics_port: int = None):
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {index} ({name}) started")
+    if metrics_port:
+        # Metrics are per process, so each worker gets its own port
+        start_metrics_server(metrics_port + index)
+        print(f"Worker {index}: metrics on :{metrics_port + index}/metrics")
+    try:
+        asyncio.run(work(name, concurrency, db_path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run resume pipeline workers for the task queue")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("RECRUITER_WORKERS", "2")),
+                        help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("RECRUITER_WORKER_CONCURRENCY", "1")),
+                        help="Applications in flight per worker process")
+    parser.add_argument("--db", type=Path, help="Task queue database (default: db/tasks.db)")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("RECRUITER_METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics on this port (+1 per further worker)")
+    parser.add_argument("--rematch-interval", type=float, default=REMATCH_INTERVAL,
+                        help="Merge job catalog changes into stored candidate matches every N seconds (0: off)")
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(i, args.concurrency, args.db, args.metrics_port), name=f"worker-{i}")
+        for i in range(args.workers)
+    ]
+    # Stop the workers too when this supervisor is terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    for process in processes:
+        process.start()
+    if args.rematch_interval > 0:
+        # One re-matcher per job database, so here rather than in every worker or API process
+        start_rematcher(interval=args.rematch_interval)
+        print(f"Re-matcher: merging job changes every {args.rematch_interval:g}s")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()